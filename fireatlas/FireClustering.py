@@ -3,14 +3,19 @@ This module include all functions used for doing fire clustering
 """
 
 import rtree
+import shapely
 import numpy as np
-import math
-import itertools
 
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from sklearn.neighbors import BallTree
 from fireatlas import settings
 from fireatlas.utils import timed
 
+# above this number of point pairs, cal_mindist uses a BallTree instead of
+# the full distance matrix
+MINDIST_MATRIX_MAX_PAIRS = 250_000
+
 
 def build_rtree(geoms, fids=False):
     """Builds Rtree from a shapely multipolygon shape
@@ -38,6 +43,117 @@ def idx_intersection(idx, bbox):
     return fids
 
 
+def intersecting_pairs(geoms, tree_geoms):
+    """Find all pairs of intersecting geometries between two sequences
+
+    A bulk-loaded STRtree is built on `tree_geoms` and queried once with all
+    of `geoms`; the exact intersects predicate is evaluated inside GEOS.
+
+    Parameters
+    ----------
+    geoms : sequence of geometries
+        query geometries (None is allowed and never intersects)
+    tree_geoms : sequence of geometries
+        geometries to build the spatial index on
+
+    Returns
+    -------
+    igeoms : np array
+        positions in `geoms` of each intersecting pair
+    itree : np array
+        positions in `tree_geoms` of each intersecting pair
+
+    The pairs are sorted by `igeoms` then `itree`.
+    """
+    if len(geoms) == 0 or len(tree_geoms) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    tree = shapely.STRtree(np.asarray(tree_geoms, dtype=object))
+    igeoms, itree = tree.query(np.asarray(geoms, dtype=object), predicate="intersects")
+
+    order = np.lexsort((itree, igeoms))
+    return igeoms[order].astype(np.int64), itree[order].astype(np.int64)
+
+
+def compute_neighbor_graph(data, max_thresh_km):
+    """Derive neighbors for each point (with x,y) using a uniform grid hash
+
+    Points are binned into square cells with the size of the distance
+    threshold, so all neighbors of a point are in its own cell or one of the
+    8 surrounding cells. Candidate pairs from those cells are generated and
+    filtered in bulk with numpy.
+
+    Parameters
+    ----------
+    data : pd DataFrame
+        point location with 'x' and 'y' columns
+    max_thresh_km : float
+        maximum distance threshold (km) used for classifying neighbors
+
+    Returns
+    -------
+    indptr : np array (n+1)
+        offsets of each point's neighbors in `indices` (CSR layout)
+    indices : np array
+        indices of neighbors (self excluded)
+    """
+    X = data[["x", "y"]].values.astype(np.float64)
+    num_points = len(X)
+    r = max_thresh_km * 1000
+
+    indptr = np.zeros(num_points + 1, dtype=np.int64)
+    if num_points == 0:
+        return indptr, np.empty(0, dtype=np.int64)
+
+    # bin points into grid cells and sort points by cell key
+    cells = np.floor(X / r).astype(np.int64)
+    cells -= cells.min(axis=0)
+    ncol = cells[:, 1].max() + 3  # leave room for the -1/+1 neighbor offsets
+    keys = (cells[:, 0] + 1) * ncol + (cells[:, 1] + 1)
+    order = np.argsort(keys, kind="stable")
+    ukeys, cell_start, cell_inv, cell_count = np.unique(
+        keys[order], return_index=True, return_inverse=True, return_counts=True
+    )
+    point_cell = np.empty(num_points, dtype=np.int64)
+    point_cell[order] = cell_inv
+
+    src_all, dst_all = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            # look up the neighboring cell once per occupied cell
+            nb_keys = ukeys + dx * ncol + dy
+            nb_cell = np.searchsorted(ukeys, nb_keys)
+            nb_cell[nb_cell == len(ukeys)] = 0
+            found = ukeys[nb_cell] == nb_keys
+            nb_start = np.where(found, cell_start[nb_cell], 0)
+            nb_count = np.where(found, cell_count[nb_cell], 0)
+
+            counts = nb_count[point_cell]
+            total = counts.sum()
+            if total == 0:
+                continue
+
+            # expand each point's candidate range into (src, dst) pairs
+            src = np.repeat(np.arange(num_points), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            dst = order[np.repeat(nb_start[point_cell], counts) + offsets]
+
+            # keep pairs within the distance threshold (self excluded)
+            d2 = ((X[src] - X[dst]) ** 2).sum(axis=1)
+            keep = (d2 <= r * r) & (src != dst)
+            src_all.append(src[keep])
+            dst_all.append(dst[keep])
+
+    if len(src_all) == 0:
+        return indptr, np.empty(0, dtype=np.int64)
+
+    src = np.concatenate(src_all)
+    dst = np.concatenate(dst_all)
+    np.cumsum(np.bincount(src, minlength=num_points), out=indptr[1:])
+
+    return indptr, dst[np.argsort(src, kind="stable")]
+
+
 def compute_all_spatial_distances(data, max_thresh_km):
     """Derive neighbors for each point (with x,y)
 
@@ -53,17 +169,9 @@ def compute_all_spatial_distances(data, max_thresh_km):
     inds : np array of np array
         indices of neighbors (self excluded)
     """
-    X = data[["x", "y"]].values
+    indptr, indices = compute_neighbor_graph(data, max_thresh_km)
 
-    bt = BallTree(X, leaf_size=20)
-
-    inds = bt.query_radius(X, r=max_thresh_km * 1000, return_distance=False)
-
-    # remove self from neighbors
-    new_inds = []
-    for i in range(len(inds)):
-        pos = np.where(inds[i] == i)
-        new_inds.append(np.delete(inds[i], pos))
+    new_inds = np.split(indices, indptr[1:-1])
 
     return np.array(new_inds, dtype=object)
 
@@ -88,59 +196,144 @@ def do_clustering(data, max_thresh_km):
     # copy the dataframe so the we don't modify it inplace
     data = data.copy()
 
-    # value to fill in pixels without clustering
-    NO_CLUSTER_VAL = -1
-
     # if number of points is 1 or 2, each point is one cluster
     num_points = len(data)
     if num_points < 3:
         data["initial_cid"] = list(range(num_points))
         return data
 
-    # initialization
-    cluster_id_counter = 0
-    point_to_cluster_id = np.full(num_points, fill_value=NO_CLUSTER_VAL, dtype=np.int64)
-
-    # compute neighbor pixels for each pixel
-    neighbor_inds = compute_all_spatial_distances(data, max_thresh_km)
-
-    # include all possible pixels in cluster
-    to_check = np.full(num_points, fill_value=1, dtype=np.int8)
-    while np.sum(to_check) > 0:
-        start_ind = np.argmax(to_check == 1)  # catch first index to check
-
-        neighbors_to_search = list(neighbor_inds[start_ind])
-        all_neighbors = neighbors_to_search
-
-        if (
-            len(all_neighbors) == 0
-        ):  # if no neighbor, record the current pixel as a separate cluster
-            point_to_cluster_id[start_ind] = cluster_id_counter
-            cluster_id_counter += 1
-            to_check[start_ind] = 0
-
-        else:  # if with neighbor, record all neighbors
-            # find all neighbours of neighbours:
-            searched_neighbours = [start_ind]
-            while len(neighbors_to_search) > 0:
-                # take the first of these
-                px = neighbors_to_search[0]
-                searched_neighbours.append(px)
-                px_neighbors = list(neighbor_inds[px])
-                all_neighbors = list(set(all_neighbors + px_neighbors))
-                neighbors_to_search = list(
-                    set(all_neighbors).difference(searched_neighbours)
-                )
-            # now we have all pixels in this cluster in all_neighbors
-            point_to_cluster_id[all_neighbors] = cluster_id_counter
-            cluster_id_counter += 1
-            to_check[all_neighbors] = 0
+    # compute neighbor pixels for each pixel (CSR adjacency)
+    indptr, indices = compute_neighbor_graph(data, max_thresh_km)
+    point_to_cluster_id = label_connected_components(num_points, indptr, indices)
 
     data["initial_cid"] = point_to_cluster_id
 
     return data
 
 
+def label_connected_components(num_points, indptr, indices):
+    """Label the connected components of a neighbor graph
+
+    The labels are ordered by the lowest point index in each component, so
+    the first point is always in cluster 0, the next point that isn't
+    connected to it starts cluster 1, and so on.
+
+    Parameters
+    ----------
+    num_points : int
+        number of points (graph nodes)
+    indptr : np array (n+1)
+        CSR offsets of the neighbor graph
+    indices : np array
+        CSR neighbor indices of the neighbor graph
+
+    Returns
+    -------
+    labels : np array (n)
+        cluster id for each point
+    """
+    graph = csr_matrix(
+        (np.ones(len(indices), dtype=np.int8), indices, indptr),
+        shape=(num_points, num_points),
+    )
+    _, labels = connected_components(graph, directed=False)
+
+    # relabel so cluster ids follow the first point of each cluster
+    _, first_inds = np.unique(labels, return_index=True)
+    ranks = np.empty(len(first_inds), dtype=np.int64)
+    ranks[np.argsort(first_inds)] = np.arange(len(first_inds))
+    return ranks[labels]
+
+
+def cal_distance_arr(locs1, locs2):
+    """Calculate the haversine distance between arrays of points
+
+    Parameters
+    ----------
+    locs1 : np.array (...x2) of [lat,lon]
+        positions of the first points
+    locs2 : np.array (...x2) of [lat,lon]
+        positions of the second points, broadcastable against locs1
+
+    Returns
+    -------
+    distance : np.array
+        distances (km) between the points
+    """
+    locs1 = np.radians(np.asarray(locs1, dtype=np.float64))
+    locs2 = np.radians(np.asarray(locs2, dtype=np.float64))
+    lat1, lon1 = locs1[..., 0], locs1[..., 1]
+    lat2, lon2 = locs2[..., 0], locs2[..., 1]
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    distance = settings.EARTH_RADIUS_KM * c
+    return distance
+
+
+def cal_distance_matrix(c1, c2):
+    """Calculate the distances between all pairs of points from two clusters
+
+    Parameters
+    ----------
+    c1 : list of [lat,lon]
+        first cluster
+    c2 : list of [lat,lon]
+        second cluster
+
+    Returns
+    -------
+    distance : np.array (n1 x n2)
+        distance (km) between each point in c1 and each point in c2
+    """
+    c1 = np.asarray(c1, dtype=np.float64).reshape(-1, 2)
+    c2 = np.asarray(c2, dtype=np.float64).reshape(-1, 2)
+    return cal_distance_arr(c1[:, None, :], c2[None, :, :])
+
+
+def cal_mindist_tree(c1, c2, thresh_km=None, chunk_size=4096):
+    """Calculate the minimum distance between two clusters using a BallTree
+    (haversine metric) built on the larger cluster
+
+    Parameters
+    ----------
+    c1 : list of [lat,lon]
+        first cluster
+    c2 : list of [lat,lon]
+        second cluster
+    thresh_km : float, optional
+        if set, stop searching as soon as any pair of points is within this
+        distance; the returned value is then <= thresh_km but not necessarily
+        the minimum
+    chunk_size : int
+        number of points of the smaller cluster queried at once
+
+    Returns
+    -------
+    mindist : float
+        the minimum distance (km) between c1 and c2
+    """
+    c1 = np.radians(np.asarray(c1, dtype=np.float64).reshape(-1, 2))
+    c2 = np.radians(np.asarray(c2, dtype=np.float64).reshape(-1, 2))
+    if len(c1) < len(c2):
+        c1, c2 = c2, c1
+
+    tree = BallTree(c1, metric="haversine")
+
+    mindist = np.inf
+    for i in range(0, len(c2), chunk_size):
+        dist, _ = tree.query(c2[i : i + chunk_size], k=1)
+        mindist = min(mindist, dist.min() * settings.EARTH_RADIUS_KM)
+        if thresh_km is not None and mindist <= thresh_km:
+            break
+
+    return mindist
+
+
 def cal_distance(loc1, loc2):
     """Calculate the distance between two points
 
@@ -156,26 +349,11 @@ def cal_distance(loc1, loc2):
     distance : float
         distance (km) between two points
     """
-    lat1 = math.radians(loc1[0])
-    lon1 = math.radians(loc1[1])
-    lat2 = math.radians(loc2[0])
-    lon2 = math.radians(loc2[1])
-
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    distance = settings.EARTH_RADIUS_KM * c
-    return distance
+    return float(cal_distance_arr(loc1, loc2))
 
 
 def cal_mindist(c1, c2):
-    """Calculate the minimum distance beween two clusters (may modify the algorithm to speed up this calculation)
+    """Calculate the minimum distance beween two clusters
 
     Parameters
     ----------
@@ -189,7 +367,11 @@ def cal_mindist(c1, c2):
     mindist : float
         the minimum distance (km) between c1 and c2
     """
-
-    mindist = min([cal_distance(l1, l2) for l1, l2 in itertools.product(c1, c2)])
+    # the full distance matrix is fastest for small clusters; switch to a
+    # tree search once it would get large
+    if len(c1) * len(c2) <= MINDIST_MATRIX_MAX_PAIRS:
+        mindist = float(cal_distance_matrix(c1, c2).min())
+    else:
+        mindist = float(cal_mindist_tree(c1, c2))
 
     return mindist
@@ -47,6 +47,10 @@ class Settings(BaseSettings):
     OUTPUT_DIR: str = Field(
         "FEDSoutput-v3", description="directory where output data is stored"
     )
+    PREPROCESSED_FORMAT: Literal["csv", "parquet"] = Field(
+        "csv",
+        description="file format preprocessed files are written in (files in either format are read)",
+    )
 
     READ_LOCATION: Location = Field(
         "s3",
@@ -116,6 +120,18 @@ class Settings(BaseSettings):
     )
     area_VI: float = Field(0.141, description="area of each 375m VIIRS pixel, km2")
 
+    hull_prune_opt: Literal["none", "interior", "grid"] = Field(
+        "none",
+        description=(
+            "pre-filter pixels before hull calculation: 'interior' drops pixels "
+            "surrounded by pixels valpha deep (hull unchanged), 'grid' keeps one pixel "
+            "per grid cell of hull_prune_grid_frac * valpha (approximate)"
+        ),
+    )
+    hull_prune_grid_frac: float = Field(
+        0.25, description="grid cell size used by hull_prune_opt='grid', fraction of valpha"
+    )
+
     # MODIS pixel size
     MCD64buf: float = Field(231.7, description="MODIS fire perimeter buffer, m")
 
@@ -159,6 +175,18 @@ class Settings(BaseSettings):
         False, description="whether to export data from MAAP to VEDA s3"
     )
     N_DASK_WORKERS: int = Field(6, description="How many dask workers to use for Run.")
+    checkpoint_steps: int = Field(
+        0,
+        description="save allfires and allpixels every this number of time steps within Fire_Forward (0: only at the end)",
+    )
+    checkpoint_minutes: float = Field(
+        0,
+        description="save allfires and allpixels when this number of minutes passed since the last save within Fire_Forward (0: only at the end)",
+    )
+    hull_workers: int = Field(
+        0,
+        description="number of processes used to calculate the cluster hulls of a time step (0 or 1: no process pool)",
+    )
 
     # ------------------------------------------------------------------------------
     # fire type related parameters
@@ -197,7 +197,8 @@ def make_gdf_snapshot(allfires, regnm, layer="perimeter"):
                 ).geometry.values
 
     # 3. modify dd1 for all fires
-    for fid, f in allfires.fires.items():  # loop over all fires
+    for fid in allfires.fids:  # loop over all fires
+        f = allfires.fires.view(fid)  # attributes of dd1 without building the fire
         for k, tp in dd1.items():
             if tp == "datetime64":
                 gdf.loc[fid, k] = FireTime.t2dt(getattr(f, k))
@@ -133,7 +133,7 @@ def find_mergefires_ct(allfires, fid):
     fids_m = []
     for h in allfires.heritages:
         if h[1] == fid:
-            if h[0] in allfires.fids:
+            if h[0] in allfires.fires:
                 f_m = allfires.fires[h[0]]
                 if (f_m.t_ed == t) & (f_m.t_st != t):
                     fids_m.append(h[0])
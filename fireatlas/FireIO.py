@@ -10,6 +10,7 @@ This module include functions used to read and save data
 # first time for mysterious reasons.
 import s3fs
 import os
+import copy
 import pandas as pd
 import numpy as np
 import geopandas as gpd
@@ -22,6 +23,7 @@ import xarray as xr
 import warnings
 from shapely.geometry import Point, Polygon
 from datetime import datetime, date
+from functools import lru_cache
 
 from fireatlas.FireLog import logger
 from fireatlas.FireTypes import TimeStep
@@ -121,14 +123,21 @@ def gpd_read_file(filename, parquet=False, **kwargs):
                 raise e
 
 
+# number of samples in a scan line of each VIIRS band
+VIIRS_N_SAMPLES = {"i": 6400, "m": 3200}
+
+
 def viirs_pixel_size(sample, band="i", rtSCAN_ANGLE=False):
     """calculate approximate size of i-band (375-m) or m-band (750-m) VIIRS pixel
         Adapted from L. Giolio's IDL code
     Usage: DS, DT = viirs_pixel_size(200,band='m',rtSCAN_ANGLE=False)
 
+    Integer samples within the scan line are looked up in tables computed
+    once per band, other samples are calculated.
+
     Parameters
     ----------
-    sample : int
+    sample : int or np.array of int
         sample number
     band : str, 'i'|'m'
         i (default) or m band
@@ -142,6 +151,33 @@ def viirs_pixel_size(sample, band="i", rtSCAN_ANGLE=False):
     DS : float
         length in along-scan dimension [km]
     """
+    sample = np.asarray(sample)
+    n_samples = VIIRS_N_SAMPLES.get(band, VIIRS_N_SAMPLES["i"])
+    if (
+        np.issubdtype(sample.dtype, np.integer)
+        and sample.size > 0
+        and sample.min() >= 0
+        and sample.max() < n_samples
+    ):
+        DS, DT, scan_angle = (a[sample] for a in _viirs_pixel_size_table(band))
+    else:
+        DS, DT, scan_angle = _viirs_pixel_size(sample, band)
+
+    if rtSCAN_ANGLE == True:
+        return DS, DT, scan_angle
+    else:
+        return DS, DT
+
+
+@lru_cache(maxsize=None)
+def _viirs_pixel_size_table(band):
+    """DS, DT and scan angle of each sample of a scan line (see viirs_pixel_size)"""
+    n_samples = VIIRS_N_SAMPLES.get(band, VIIRS_N_SAMPLES["i"])
+    return _viirs_pixel_size(np.arange(n_samples), band)
+
+
+def _viirs_pixel_size(sample, band):
+    """DS, DT and scan angle of samples (see viirs_pixel_size)"""
 
     # set constants
     earth_radius = 6371.0  # earth radius [km]
@@ -188,12 +224,9 @@ def viirs_pixel_size(sample, band="i", rtSCAN_ANGLE=False):
     sqrt_temp = np.sqrt(temp)
     DS = earth_radius * ss * (cos_theta / sqrt_temp - 1.0)
     DT = r * st * (cos_theta - sqrt_temp)
+    scan_angle = np.rad2deg(theta)
 
-    if rtSCAN_ANGLE == True:
-        scan_angle = np.rad2deg(theta)
-        return DS, DT, scan_angle
-    else:
-        return DS, DT
+    return DS, DT, scan_angle
 
 
 def read_geojson_nv_CA(y0=2012, y1=2019):
@@ -531,14 +564,22 @@ def AFP_regfilter(df, shp_Reg):
         & (df["Lon"] >= regext[0])
         & (df["Lon"] <= regext[2])
     ]
-    point_data = [Point(xy) for xy in zip(newfirepixels["Lon"], newfirepixels["Lat"])]
-    gdf_filtered = gpd.GeoDataFrame(newfirepixels, geometry=point_data, crs=4326)
 
-    # Do detailed filtering (within shp_Reg)
-    gdf_filtered = gdf_filtered[gdf_filtered["geometry"].within(shp_Reg)]
+    # Do detailed filtering (within shp_Reg): a point is within shp_Reg
+    # if shp_Reg contains it, tested on the coordinates against the
+    # prepared geometry (a prepared copy, the caller's shp_Reg is left as is)
+    if not shapely.is_prepared(shp_Reg):
+        shp_Reg = copy.copy(shp_Reg)
+        shapely.prepare(shp_Reg)
+    inside = shapely.contains_xy(
+        shp_Reg,
+        newfirepixels["Lon"].to_numpy(dtype=np.float64),
+        newfirepixels["Lat"].to_numpy(dtype=np.float64),
+    )
+    newfirepixels = newfirepixels[inside]
 
-    # drop geometry column and project to epsg
-    df_filtered = AFP_toprj(gdf_filtered)
+    # project to epsg
+    df_filtered = AFP_toprj(newfirepixels)
 
     return df_filtered
 
@@ -591,19 +632,37 @@ def AFP_setampm(df):
     return df_withampm
 
 
-def AFP_toprj(gdf):
+@lru_cache(maxsize=None)
+def get_transformer(src, dst, always_xy=True):
+    """Cached pyproj Transformer between two crs
+
+    Parameters
+    ----------
+    src, dst : int or str
+        the source and destination crs (EPSG code or any crs string pyproj accepts)
+    always_xy : bool
+        take and return coordinates in x (lon), y (lat) order whatever the crs
+        axis order
+
+    Returns
+    -------
+    transformer : pyproj.Transformer
+    """
+    return pyproj.Transformer.from_crs(src, dst, always_xy=always_xy)
+
+
+def AFP_toprj(df):
     """Transforms lat/lon coordinates to projected coordinate system for computations in m
     for global studies probably proj:cea would be a good choice
     for the boreals we use North Pole LAEA (epsg:3571)
     for CA may use WGS 84 / UTM zone 10N (epsg: 32610)
-    for US may use US National Atlas Equal Area (epsg: 9311)"""
+    for US may use US National Atlas Equal Area (epsg: 9311)
 
-    gdf = gdf.to_crs(epsg=settings.EPSG_CODE)
-    gdf["x"] = gdf.geometry.x
-    gdf["y"] = gdf.geometry.y
-    df = pd.DataFrame(gdf.drop(columns="geometry"))
+    Returns a copy of df with the projected coordinates in columns x and y"""
 
-    return df
+    transformer = get_transformer(4326, settings.EPSG_CODE)
+    x, y = transformer.transform(df["Lon"].values, df["Lat"].values)
+    return df.assign(x=x, y=y)
 
 
 # ------------------------------------------------------------------------------
@@ -789,7 +848,7 @@ def get_LCT(locs):
     # read NLCD 500m data
     fnmLCT = os.path.join(settings.dirextdata, "CA", "nlcd_510m.tif")
     dataset = rasterio.open(fnmLCT)
-    transformer = pyproj.Transformer.from_crs("epsg:4326", dataset.crs)
+    transformer = get_transformer("epsg:4326", dataset.crs.to_wkt(), always_xy=False)
     locs_crs_x, locs_crs_y = transformer.transform(
         # NOTE: EPSG 4326 expected coordinate order latitude, longitude, but
         # `locs` is x (longitude), y (latitude). That's why `l[1]`, then `l[0]`
@@ -1050,7 +1109,8 @@ def save_fobj(allfires, t, regnm, activeonly=False):
         allfires_index = 0
         for fid in fids_out:
             # allfires_out.fires.append(allfires.fires[fid])
-            allfires_out.fires[fid] = allfires.fires[fid]
+            # a copy (own fire table row and property cache), allfires keeps the fire
+            allfires_out.fires[fid] = copy.copy(allfires.fires[fid])
             id_dict.append((allfires_index, fid))
             allfires_index += 1
 
@@ -1966,10 +2026,7 @@ def save2gtif(arr, outfile, cols, rows, geotrans, proj):
 def geo_to_polar(lon_arr, lat_arr):
     """transform lists of geographic lat lon coordinates to polar LAEA grid (projected)"""
 
-    proj4str = "epsg:3571"
-    p_modis_grid = pyproj.Proj(proj4str)
-
-    x_arr, y_arr = p_modis_grid(lon_arr, lat_arr)
+    x_arr, y_arr = get_transformer(4326, 3571).transform(lon_arr, lat_arr)
     x_arr = np.array(x_arr)
     y_arr = np.array(y_arr)
 
@@ -1978,10 +2035,7 @@ def geo_to_polar(lon_arr, lat_arr):
 
 def polar_to_geo(x_arr, y_arr):
     """transform lists of geographic lat lon coordinates to polar LAEA grid (projected)"""
-    proj4str = "epsg:3571"
-    p_modis_grid = pyproj.Proj(proj4str)
-
-    lon_arr, lat_arr = p_modis_grid(x_arr, y_arr, inverse=True)
+    lon_arr, lat_arr = get_transformer(3571, 4326).transform(x_arr, y_arr)
     lon_arr = np.array(lon_arr)
     lat_arr = np.array(lat_arr)
 
@@ -19,9 +19,12 @@ Modules required
 """
 import time
 import os
+import numpy as np
 import geopandas as gpd
 import pandas as pd
 import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 from fireatlas.FireTypes import Region, TimeStep
 from fireatlas.utils import timed
@@ -199,42 +202,43 @@ def Fire_expand_rtree(allfires, allpixels, tpixels, fids_ea):
     # derive fire connecting ranges of existing active fires (fids_ea)
     eafirerngs = set_eafirerngs(allfires, fids_ea)
 
-    # create a spatial index based on geometry bounds of fire connecting ranges
-    ea_idx = FireClustering.build_rtree(eafirerngs)
+    # calculate the hull of each new cluster in one batch
+    clusters = list(tpixels.groupby("initial_cid"))
+    hulls = FireVector.cal_hulls(tpixels, by="initial_cid").values
+
+    # find all (cluster, existing active fire) pairs where the cluster touches
+    # the fire connecting range, using a bulk spatial index query
+    ics, id_cfs = FireClustering.intersecting_pairs(hulls, eafirerngs)
+
+    # each cluster can only be appended to one existing object (the first one)
+    cluster_targets = {}
+    for ic, id_cf in zip(ics, id_cfs):
+        cluster_targets.setdefault(ic, id_cf)
 
     # loop over all new clusters (0:cid-1) and determine its fate
     FP2expand = {}  # a dict to record {fid : Firepixel objects} pairs
-    for ic, pixels in tpixels.groupby("initial_cid"):
-        hull = FireVector.cal_hull(pixels[["x", "y"]].values)
+    for ic, (_, pixels) in enumerate(clusters):
+        hull = hulls[ic]
 
         # if the cluster is close enough to an existing active fire object
         #   record all pixels to be added to the existing object (no actual changes on existing fire objects)
-        
-        # find potential neighbors using spatial index
-        id_cfs = FireClustering.idx_intersection(ea_idx, hull.bounds)
         clusterdone = False
-
-         # loop over all potential eafires
-        for id_cf in id_cfs:
-            # each cluster can only be appended to one existing object
-            if clusterdone == False:
-                # determine if cluster touch fire connecting range
-                if eafirerngs[id_cf].intersects(hull):
-                    # record existing target fire id in fid_expand list
-                    # this is the fire id of the existing active fire
-                    fmid = fids_ea[id_cf]
-                    # record pixels from target cluster (locs and time) along with the existing active fire object id
-                    # single existing object, can have multiple new clusters to append
-                    if fmid in FP2expand.keys():
-                        FP2expand[fmid] = pd.concat([FP2expand[fmid], pixels])  # new pixels
-                    else:
-                        FP2expand[fmid] = pixels  # new pixels
-                    
-                    # record fmid to fid_expanded ? is this same as list(FP2expand.keys)?
-                    fids_expanded.append(fmid)  
-                    
-                    # mark the cluster as done (no need to create new Fobj)
-                    clusterdone = True
+        if ic in cluster_targets:
+            # record existing target fire id in fid_expand list
+            # this is the fire id of the existing active fire
+            fmid = fids_ea[cluster_targets[ic]]
+            # record pixels from target cluster (locs and time) along with the existing active fire object id
+            # single existing object, can have multiple new clusters to append
+            if fmid in FP2expand.keys():
+                FP2expand[fmid] = pd.concat([FP2expand[fmid], pixels])  # new pixels
+            else:
+                FP2expand[fmid] = pixels  # new pixels
+
+            # record fmid to fid_expanded ? is this same as list(FP2expand.keys)?
+            fids_expanded.append(fmid)
+
+            # mark the cluster as done (no need to create new Fobj)
+            clusterdone = True
 
         # if this cluster can't be appended to any existing Fobj:
         #     create a new fire object using the new cluster
@@ -315,13 +319,16 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
     # extract existing active fire data (use extending ranges)
     eafirerngs = set_eafirerngs(allfires, fids_ea)
 
-    # create a spatial index based on geometry bounds of fire connecting ranges
-    ea_idx = FireClustering.build_rtree(eafirerngs)
-
     # extract new and recently expanded fire data (use hulls without buffer)
     nefires = [allfires.fires[fid] for fid in fids_ne]
     nefirehulls = [f.hull for f in nefires]
 
+    # find all (ne fire, existing active fire) pairs where the hull touches the
+    # fire connecting range, using a bulk spatial index query
+    ea_candidates = collections.defaultdict(list)
+    for id_ne, id_ea in zip(*FireClustering.intersecting_pairs(nefirehulls, eafirerngs)):
+        ea_candidates[id_ne].append(id_ea)
+
     # loop over all fire objects that have newly expanded or formed, record merging fire id pairs
     fids_merge = []  # initialize the merged fire id pairs (source id:target id)
     # flag to mark an newly expanded fire obj that has been invalidated
@@ -331,31 +338,27 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
         if (
             firedone[fid_ne] == False
         ):  # skip objects that have been merged to others in earlier loop
-            # potential neighbors
-            id_cfs = FireClustering.idx_intersection(ea_idx, nefirehulls[id_ne].bounds)
-            # loop over all potential neighbor fobj candidiates
-            for id_ea in id_cfs:
+            # loop over all neighbor fobj whose fire connecting range touches the hull
+            for id_ea in ea_candidates[id_ne]:
                 fid_ea = fids_ea[id_ea]  # fire id of existing active fire
                 # if fid_ne == fid_ea, skip;
                 # if the expanded fire has been merged to a existing active fire, skip the rest loops
                 if fid_ne != fid_ea:
-                    # if fire fmid is within distance of fire fid, two objects will merge
-                    if nefirehulls[id_ne].intersects(eafirerngs[id_ea]):
-                        # the fire id of neighboring active Fobj
-                        # depending on which fid is smaller, merge the two fire objects in different directions
-                        if fid_ea > fid_ne:  # merge fid_ea to fid_ne
-                            fids_merge.append((fid_ea, fid_ne))
-                            if fid_ea in firedone.keys():
-                                firedone[
-                                    fid_ea
-                                ] = True  # remove fid_ea from the newly expanded fire list (since it has been invalidated)
-                        else:  # merge fid_ne to fid_ea
-                            fids_merge.append((fid_ne, fid_ea))
-                            # fid_ne is merged to others, so stop it and check the next id_ne
-                            ## technically the eafirerngs and nefirehulls have to be updated before the next loop happens
-                            ## else it can happen that intersections are not being detected
-                            ## if more than two fires grow together!!
-                            # break
+                    # the fire id of neighboring active Fobj
+                    # depending on which fid is smaller, merge the two fire objects in different directions
+                    if fid_ea > fid_ne:  # merge fid_ea to fid_ne
+                        fids_merge.append((fid_ea, fid_ne))
+                        if fid_ea in firedone.keys():
+                            firedone[
+                                fid_ea
+                            ] = True  # remove fid_ea from the newly expanded fire list (since it has been invalidated)
+                    else:  # merge fid_ne to fid_ea
+                        fids_merge.append((fid_ne, fid_ea))
+                        # fid_ne is merged to others, so stop it and check the next id_ne
+                        ## technically the eafirerngs and nefirehulls have to be updated before the next loop happens
+                        ## else it can happen that intersections are not being detected
+                        ## if more than two fires grow together!!
+                        # break
 
     # now check if any of the sleeper fires may have reactivated by new/expanded fires
     if len(fids_sleep) > 0:  # check if there are potential sleepers
@@ -370,8 +373,13 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
         # extract ne fires sleeper range
         nefiresleeperrangs = set_sleeperrngs(allfires, fids_ne)
 
-        # create a spatial index based on geometry bounds of ne fire sleeper ranges
-        ne_idx = FireClustering.build_rtree(nefiresleeperrangs)
+        # find all (sleeper, ne fire) pairs where the sleeper fire line touches
+        # the ne fire sleeper range, using a bulk spatial index query
+        ne_candidates = collections.defaultdict(list)
+        for id_sleep, id_ne in zip(
+            *FireClustering.intersecting_pairs(sleepflines, nefiresleeperrangs)
+        ):
+            ne_candidates[id_sleep].append(id_ne)
 
         # do the check analoguous to above; loop over each sleeper fire
         firedone = {
@@ -386,25 +394,20 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
             if (
                 firedone[fid_sleep] == False
             ):  # skip objects that have been merged to others in earlier loop
-                # potential neighbors
-                id_cfs = FireClustering.idx_intersection(
-                    ne_idx, sleepflines[id_sleep].bounds
-                )
-                # loop over all potential neighbour fobj candidates
-                for id_ne in id_cfs:
+                # loop over all neighbour fobj whose sleeper range touches the fire line
+                for id_ne in ne_candidates[id_sleep]:
                     fid_ne = fids_ne[id_ne]
-                    if nefiresleeperrangs[id_ne].intersects(sleepflines[id_sleep]):
-                        # depending on which fid is smaller, merge the two fire objects in different directions
-                        if (
-                            fid_ne > fid_sleep
-                        ):  # merge new fire to sleeper, reactivate sleeper
-                            fids_merge.append((fid_ne, fid_sleep))
-                            if fid_ne in firedone.keys():
-                                firedone[
-                                    fid_ne
-                                ] = True  # remove fid_ne from the newly expanded fire list (since it has been invalidated)
-                        else:  # merge sleeper to new or expanded fire
-                            fids_merge.append((fid_sleep, fid_ne))
+                    # depending on which fid is smaller, merge the two fire objects in different directions
+                    if (
+                        fid_ne > fid_sleep
+                    ):  # merge new fire to sleeper, reactivate sleeper
+                        fids_merge.append((fid_ne, fid_sleep))
+                        if fid_ne in firedone.keys():
+                            firedone[
+                                fid_ne
+                            ] = True  # remove fid_ne from the newly expanded fire list (since it has been invalidated)
+                    else:  # merge sleeper to new or expanded fire
+                        fids_merge.append((fid_sleep, fid_ne))
 
     # loop over each pair in the fids_merge, and do modifications for both target and source objects
     #  - target: t_ed; pixels, newpixels, hull
@@ -429,6 +432,7 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
             # - target fire add source pixels to pixels, extpixels
             f_target.extpixels = f_source.extpixels
             f_target.pixels = pd.concat([f_target.pixels, f_source.pixels])
+            f_source.pixels_taken()
 
             # - update the hull using previous hull and new pixels
             f_target.updatefhull(f_source.hull)
@@ -455,10 +459,141 @@ def Fire_merge_rtree(allfires, fids_ne, fids_ea, fids_sleep):
 
     return allfires
 
+def iter_preprocessed(list_of_ts, region, location=None, prefetch=4):
+    """ Read the preprocessed pixels of each time step in order, reading up to
+    prefetch time steps ahead on a background thread
+
+    Parameters
+    ----------
+    list_of_ts : list
+        time steps to read
+    region : tuple
+        the region name and geometry
+    location :
+        where to read preprocessed files from
+    prefetch : int
+        number of time steps read ahead of the one being consumed
+
+    Yields
+    ------
+    df : pandas.DataFrame
+        preprocessed pixels of the next time step in list_of_ts
+    """
+    from fireatlas.preprocess import read_preprocessed
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = collections.deque()
+        for t in list_of_ts:
+            pending.append(pool.submit(read_preprocessed, t, region=region, location=location))
+            if len(pending) > prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def next_pixel_block(pixels_stream, prefetch, min_rows=0):
+    """ Take the preprocessed pixels of the next time steps from pixels_stream:
+    at least prefetch time steps, and more until they hold min_rows pixels
+
+    Each append_pixels copies allpixels, so taking blocks of at least
+    len(allpixels) pixels makes allpixels grow geometrically and the copies
+    add up to linear time in the number of pixels.
+
+    Parameters
+    ----------
+    pixels_stream : iterator
+        preprocessed pixels of each time step (see iter_preprocessed)
+    prefetch : int
+        minimum number of time steps to take
+    min_rows : int
+        minimum number of pixels to take
+
+    Returns
+    -------
+    dfs : list of pandas.DataFrame
+        preprocessed pixels of the next time steps, in order (fewer when
+        pixels_stream runs out)
+    """
+    dfs, n_rows = [], 0
+    for df in pixels_stream:
+        dfs.append(df)
+        n_rows += len(df)
+        if len(dfs) >= prefetch and n_rows >= min_rows:
+            break
+    return dfs
+
+
+def append_pixels(allpixels, dfs, t_slices, dtypes=None):
+    """ Append the preprocessed pixels of later time steps to allpixels
+
+    Parameters
+    ----------
+    allpixels : pandas.DataFrame
+        all fire pixels so far, sorted by "t"
+    dfs : list of pandas.DataFrame
+        preprocessed pixels of the following time steps, in order
+    t_slices : dict
+        row slices of the time steps in allpixels (see pixel_t_slices),
+        extended in place with the new time steps
+    dtypes : pandas.Series
+        column dtypes to cast the new pixels to (those of the saved allpixels)
+
+    Returns
+    -------
+    allpixels : pandas.DataFrame
+        a new frame with the rows of allpixels first (same row positions);
+        take dfs with next_pixel_block to keep the copies linear overall
+    """
+    dfs = [df for df in dfs if not df.empty]
+    if len(dfs) == 0:
+        return allpixels
+    newpixels = pd.concat(dfs)
+    newpixels["fid"] = -1
+    newpixels["in_fline"] = None
+    newpixels["ext_until"] = None
+    if dtypes is not None:
+        newpixels = newpixels.astype(dtypes.to_dict())
+
+    n = len(allpixels)
+    for hd, sl in pixel_t_slices(newpixels).items():
+        t_slices[hd] = slice(sl.start + n, sl.stop + n)
+    if n == 0:
+        return newpixels
+    return pd.concat([allpixels, newpixels])
+
+
+def pixel_t_slices(allpixels):
+    """ Row slices of the pixels of each time step in allpixels
+
+    Parameters
+    ----------
+    allpixels : pandas.DataFrame
+        all fire pixels, sorted by "t"
+
+    Returns
+    -------
+    t_slices : dict
+        half-day index of the time step -> slice of allpixels rows
+    """
+    ts = allpixels["t"].values
+    hds, starts = np.unique(FireTime.dt2hd(ts), return_index=True)
+    ends = np.append(starts[1:], len(ts))
+    return {hd: slice(lo, hi) for hd, lo, hi in zip(hds.tolist(), starts.tolist(), ends.tolist())}
+
+
 @timed
-def Fire_Forward_one_step(allfires, allpixels, tst, t, region):    
+def Fire_Forward_one_step(allfires, allpixels, tst, t, region, t_slices=None):
+    from fireatlas.FireObj import property_cache_stats
+    from fireatlas.FireVector import hull_prune_stats
+
     logger.info("--------------------")
     logger.info(f"Fire tracking at {t}")
+    property_cache_stats.clear()
+    hull_prune_stats.clear()
+
+    # fires read their pixels from the current allpixels frame
+    if allfires.allpixels is not allpixels:
+        allfires.update_allpixels(allpixels)
 
     if FireTime.isyearst(t):
         allfires.newyear_reset(region[0])
@@ -469,7 +604,11 @@ def Fire_Forward_one_step(allfires, allpixels, tst, t, region):
     # 2. update t of allfires, clean up allfires and fire object
     allfires.cleanup(t)
 
-    tpixels = allpixels[allpixels["t"] == FireTime.t2dt(t)]
+    if t_slices is None:
+        tpixels = allpixels[allpixels["t"] == FireTime.t2dt(t)]
+    else:
+        # contiguous rows of allpixels (sorted by t); only read in this step
+        tpixels = allpixels.iloc[t_slices.get(FireTime.t2hd(t), slice(0, 0))]
 
     # 4.5. if active fire pixels are detected, do fire expansion/merging
     if len(tpixels) > 0:
@@ -501,11 +640,70 @@ def Fire_Forward_one_step(allfires, allpixels, tst, t, region):
     # 10. update allfires gdf
     allfires.update_gdf()
 
+    # 11. drop the Fire objects of fires that will not be reactivated
+    allfires.evict_deadfires()
+
+    logger.info(
+        f"fire property cache: {property_cache_stats['hits']} hits, "
+        f"{property_cache_stats['misses']} misses"
+    )
+    if settings.hull_prune_opt != "none":
+        logger.info(
+            f"hull pixel pruning ({settings.hull_prune_opt}): dropped "
+            f"{hull_prune_stats['pruned']} of {hull_prune_stats['pixels']} pixels"
+        )
+
     return allfires
 
 
+def checkpoint_due(n_steps, minutes):
+    """ Whether a checkpoint is due, n_steps time steps and minutes minutes
+    after the last one (see settings.checkpoint_steps, checkpoint_minutes)
+    """
+    return (0 < settings.checkpoint_steps <= n_steps) or (
+        0 < settings.checkpoint_minutes <= minutes
+    )
+
+
+@timed
+def save_checkpoint(
+    allfires, allpixels, tst, t, region, saved_ts, pixel_base=None, gdf_base=None
+):
+    """ Save allfires and allpixels at t and add t to the manifest listing
+    saved_ts, so that a run with restart=False resumes after t (pixel_base,
+    gdf_base: see save_allpixels, save_allfires_gdf)
+
+    Returns
+    -------
+    filepaths : list
+        the saved allpixels and allfires delta files
+    pixel_base, gdf_base : pandas.DataFrame
+        the saved state, to pass to the next save of the run so that it only
+        writes what changed since this one
+    """
+    from fireatlas.postprocess import (
+        save_allfires_gdf,
+        save_allpixels,
+        save_manifest,
+        saved_allfires_base,
+        saved_allpixels_base,
+    )
+
+    filepaths = [
+        save_allpixels(allpixels, tst, t, region, base=pixel_base),
+        save_allfires_gdf(allfires.gdf, tst, t, region, base=gdf_base),
+    ]
+    save_manifest([*saved_ts, t], tst, region)
+    logger.info(f"checkpoint saved at {t}")
+    return (
+        filepaths,
+        saved_allpixels_base(allpixels, t, base=pixel_base),
+        saved_allfires_base(allfires.gdf, base=gdf_base),
+    )
+
+
 @timed
-def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_location=None, read_saved_location=None):
+def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_location=None, read_saved_location=None, stream=False, prefetch=4):
     """ The wrapper function to progressively track all fire events for a time period
 
     Parameters
@@ -520,17 +718,25 @@ def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_
         where to read preprocessed files from
     read_saved_location:
         where to read saved allfires and allpixels from
+    stream : bool
+        read the preprocessed time steps while tracking (in blocks of at least
+        prefetch steps, read ahead in the background) instead of all up front
+    prefetch : int
+        minimum number of time steps per block in stream mode (blocks also
+        hold at least as many pixels as already read, see next_pixel_block)
     Returns
     -------
     allfires : FireObj allfires object
         the allfires object at end date
     """
-    from fireatlas.preprocess import read_preprocessed
     from fireatlas.postprocess import (
         get_t_of_last_allfires_run,
+        read_allfires_gdf,
         read_allpixels,
+        read_saved_ts,
         save_allfires_gdf,
         save_allpixels,
+        save_manifest,
     )
     from fireatlas.FireObj import Allfires
 
@@ -547,7 +753,7 @@ def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_
         )
         if t_saved is None:
             logger.warn("No saved version of allfires and allpixels")
-        elif t_saved == ted:
+        elif FireTime.t2hd(t_saved) == FireTime.t2hd(ted):
             raise KeyError(
                 f"Nothing left to do. There is already a saved version "
                 f"of allfires and allpixels at {t_saved=}."
@@ -555,17 +761,25 @@ def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_
     if t_saved:
         # list of all the timesteps that we still need to run on
         list_of_ts = list(FireTime.t_generator(FireTime.t_nb(t_saved, "next"), ted))
+        # the saves after t_saved will not match the partitions rewritten
+        # from here, drop them from the manifest
+        saved_ts = [
+            t for t in read_saved_ts(tst, region, location=read_saved_location) or []
+            if FireTime.t2hd(t) < FireTime.t2hd(t_saved)
+        ] + [t_saved]
     else:
         list_of_ts = list(FireTime.t_generator(tst, ted))
+        saved_ts = []
      
-    # read in preprocessed pixel data
-    list_of_allpixels = [
-        read_preprocessed(t, region=region, location=read_location)
-        for t in list_of_ts
-    ]
+    # read in preprocessed pixel data (only the first time step when streaming)
+    pixels_stream = iter_preprocessed(
+        list_of_ts, region, location=read_location, prefetch=prefetch
+    )
+    list_of_allpixels = list(itertools.islice(pixels_stream, 1 if stream else None))
     non_empty_dfs = [df for df in list_of_allpixels if not df.empty]
     if len(list_of_allpixels) > 0 and len(non_empty_dfs) == 0:
-        logger.warning(f"There are no new pixels for {ted}")
+        if not stream:
+            logger.warning(f"There are no new pixels for {ted}")
         allpixels = list_of_allpixels[0]
     else:
         allpixels = pd.concat(non_empty_dfs)
@@ -574,23 +788,49 @@ def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_
     allpixels["in_fline"] = None
     allpixels["ext_until"] = None
     
+    dtypes = None
+    pixel_base = None  # state of the saved pixels as in their saved partitions
     if t_saved:
-        allpixels_saved = read_allpixels(
+        allpixels_saved, pixel_base = read_allpixels(
             tst, 
             t_saved,
             region,
-            location=read_saved_location
+            location=read_saved_location,
+            with_base=True,
+        )
+        # categorical columns keep their own categories (casting to the saved
+        # categories would lose the values not in them)
+        dtypes = allpixels_saved.dtypes.map(
+            lambda tp: "category" if isinstance(tp, pd.CategoricalDtype) else tp
         )
         for col in allpixels_saved.columns:
-            allpixels[col] = allpixels[col].astype(allpixels_saved[col].dtype)    
+            allpixels[col] = allpixels[col].astype(dtypes[col])
 
         allpixels = pd.concat([allpixels_saved, allpixels])
+
+    # keep the pixels of each time step contiguous, so that each step takes
+    # its pixels as a slice (row positions are fixed from here on)
+    if not allpixels["t"].is_monotonic_increasing:
+        allpixels = allpixels.sort_values("t", kind="stable")
+    t_slices = pixel_t_slices(allpixels)
+
+    gdf_base = None  # state of the saved gdf rows as in their saved partitions
+    if t_saved:
+        allfires_gdf, gdf_base = read_allfires_gdf(
+            tst,
+            t_saved,
+            region,
+            location=read_saved_location,
+            with_base=True,
+        )
         allfires = Allfires.rehydrate(
             tst,
             t_saved,
             region,
             allpixels=allpixels,
+            allfires_gdf=allfires_gdf,
             include_dead=True,
+            lazy_dead=True,
             read_location=read_saved_location
         )
     else:
@@ -598,12 +838,38 @@ def Fire_Forward(tst: TimeStep, ted: TimeStep, restart=False, region=None, read_
         allfires = Allfires(tst)
 
     # loop over every t during the period, mutate allfires, allpixels, save
-    for t in list_of_ts:
-        allfires = Fire_Forward_one_step(allfires, allpixels, tst, t, region)
+    n_read = len(list_of_allpixels)
+    checkpoint = (0, time.time(), [])  # step, time and files of the last one
+    for i, t in enumerate(list_of_ts):
+        if i == n_read:
+            # stream mode: append the next block of time steps
+            dfs = next_pixel_block(pixels_stream, prefetch, min_rows=len(allpixels))
+            n_read += len(dfs)
+            allpixels = append_pixels(allpixels, dfs, t_slices, dtypes=dtypes)
+        allfires = Fire_Forward_one_step(
+            allfires, allpixels, tst, t, region, t_slices=t_slices
+        )
 
-    # save allpixels and allfires locally for ted
-    save_allpixels(allpixels, tst, ted, region)
-    save_allfires_gdf(allfires.gdf, tst, ted, region)
+        # periodic checkpoint (the state at ted is saved below); an earlier
+        # checkpoint of this run is removed once a later one is written
+        step, tck, filepaths = checkpoint
+        if i + 1 < len(list_of_ts) and checkpoint_due(
+            i + 1 - step, (time.time() - tck) / 60
+        ):
+            saved, pixel_base, gdf_base = save_checkpoint(
+                allfires, allpixels, tst, t, region, saved_ts, pixel_base, gdf_base
+            )
+            checkpoint = (i + 1, time.time(), saved)
+            for filepath in filepaths:
+                os.remove(filepath)
+
+    # save allpixels and allfires locally for ted and list ted in the
+    # manifest in place of the last checkpoint, then remove its files
+    save_allpixels(allpixels, tst, ted, region, base=pixel_base)
+    save_allfires_gdf(allfires.gdf, tst, ted, region, base=gdf_base)
+    save_manifest([*saved_ts, ted], tst, region)
+    for filepath in checkpoint[2]:
+        os.remove(filepath)
 
     return allfires, allpixels, t_saved
 
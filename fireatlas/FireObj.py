@@ -8,13 +8,20 @@ FOUR LAYERS OF OBJECTS
     d. FirePixel: the class of an active fire pixel
 """
 
+import copy
+
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+from collections import Counter
+from collections.abc import MutableMapping
+from functools import partial
 from datetime import date, timedelta
 from shapely.geometry import MultiLineString, MultiPoint
 from shapely.ops import unary_union
 
 from fireatlas.utils import timed
-from fireatlas.FireTime import t2dt, dt2t, t_nb, t_dif
+from fireatlas.FireTime import t2dt, dt2t, t_nb, t2hd, hd2t, dt2hd, hd2dt
 from fireatlas.postprocess import read_allfires_gdf, read_allpixels
 from fireatlas.FireFuncs import set_ftype
 from fireatlas.FireGpkg_sfs import getdd as singlefire_getdd
@@ -23,6 +30,9 @@ from fireatlas import FireVector
 from fireatlas import FireConsts
 from fireatlas import settings
 
+# hits/misses of the derived Fire property cache (reset at each time step)
+property_cache_stats = Counter()
+
 
 # a. Object - Allfires
 class Allfires:
@@ -59,6 +69,9 @@ class Allfires:
         # initialize a geodataframe to hold the accumulated burning fire information
         self.init_gdf()
 
+        # all fire pixels the fires read from (set by rehydrate/update_allpixels)
+        self.allpixels = None
+
         # cumulative recordings
         self.heritages = []  # a list of fire heritage relationships (source, target)
         self.id_dict = (
@@ -69,6 +82,45 @@ class Allfires:
     def __repr__(self):
         return f"<Allfires at t={self.t} with n_fires={len(self.fires)}>"
 
+    @property
+    def fires(self):
+        """dict of Fire objects with fireID as the key (a FireDict)"""
+        return self._fires
+
+    @fires.setter
+    def fires(self, fires):
+        self._fires = FireDict(fires)
+
+    @property
+    def table(self):
+        """FireTable holding the state of all fires"""
+        return self._fires.table
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        fires = state.pop("_fires")
+        # fires not built are pickled as their FireTable values (a dict)
+        state["fires"] = {
+            fid: fires[fid] if fires.loaded(fid) else fires.view(fid)._values()
+            for fid in fires
+        }
+        return state
+
+    def __setstate__(self, state):
+        fires = state.pop("fires")
+        gdf = state.pop("gdf", None)  # pickled before the chunked gdf
+        state.setdefault("allpixels", None)
+        self.__dict__.update(state)
+        self.fires = {}
+        for fid, f in fires.items():
+            if isinstance(f, dict):
+                # rebuilt from the gdf on first access, as evicted fires
+                self.fires.add_lazy(fid, f, self._reload_fire)
+            else:
+                self.fires[fid] = f
+        if gdf is not None:
+            self.gdf = gdf
+
     def init_gdf(self):
 
         gdf = gpd.GeoDataFrame(
@@ -84,42 +136,73 @@ class Allfires:
 
     @classmethod
     @timed
-    def rehydrate(cls, tst, ted, region, allpixels=None, include_dead=False, read_location=None):
-        allfires_gdf = read_allfires_gdf(tst, ted, region, location=read_location)
+    def rehydrate(
+        cls,
+        tst,
+        ted,
+        region,
+        allpixels=None,
+        allfires_gdf=None,
+        include_dead=False,
+        lazy_dead=False,
+        read_location=None,
+    ):
+        """Rebuild the Allfires object at ted from the saved allfires gdf
+
+        Parameters
+        ----------
+        allpixels, allfires_gdf : DataFrame, GeoDataFrame
+            allpixels and the allfires gdf at ted (read when not given)
+        include_dead : bool
+            also rebuild fires inactive for more than limoffdays at ted
+        lazy_dead : bool
+            with include_dead, only fill in the fire table for dead fires;
+            their Fire objects are built from the gdf on first access
+        """
+        if allfires_gdf is None:
+            allfires_gdf = read_allfires_gdf(tst, ted, region, location=read_location)
         if allpixels is None:
             allpixels = read_allpixels(tst, ted, region, location=read_location)
 
         dt = t2dt(ted)
 
         has_started = allfires_gdf.t_st <= dt
+        dt_dead = dt - timedelta(days=settings.limoffdays)
         if not include_dead:
-            dt_dead = dt - timedelta(days=settings.limoffdays)
             not_dead = allfires_gdf.t_ed >= dt_dead
             gdf = allfires_gdf[has_started & not_dead]
         else:
             gdf = allfires_gdf[has_started]
+        t_ed = gdf.t_ed.groupby(level=0).max()  # last time step of each fire
 
         allfires = cls(ted)
         allfires.gdf = allfires_gdf
-        for fid, gdf_fid in gdf.groupby(level=0):
-            f = Fire(fid, ted, allpixels)
-            dt_st = gdf_fid.t_st.min()
-            dt_ed = gdf_fid.t_ed.max()
-
-            if len(gdf_fid) > 1:
-                f.fline_prior = gdf_fid.iloc[-2].fline
-
-            gdf_fid_t = gdf_fid.loc[(fid, dt_ed)]
-            for k, v in gdf_fid_t.items():
-                if not isinstance(getattr(Fire, k, None), property):
-                    setattr(f, k, v)
-            
-            f.t_st = dt2t(dt_st)
-            f.t_ed = dt2t(dt_ed)
-
-            if f.mergeid != fid:
-                allfires.heritages.append((fid, f.mergeid))
-            
+        allfires.allpixels = allpixels
+        rows_by_fid = group_pixel_rows(allpixels)
+        groups = gdf.groupby(level=0).indices
+
+        def load(fid):
+            return fire_from_gdf(
+                fid, gdf.iloc[groups[fid]], ted, allfires.allpixels, rows_by_fid
+            )
+
+        dead = {}
+        if include_dead and lazy_dead:
+            dead = fire_values_from_gdf(gdf, t_ed[t_ed < dt_dead], ted)
+
+        for fid in t_ed.index:
+            if fid in dead:
+                allfires.fires.add_lazy(fid, dead[fid], load)
+                mergeid = dead[fid]["mergeid"]
+            else:
+                f = load(fid)
+                mergeid = f.mergeid
+
+            if mergeid != fid:
+                allfires.heritages.append((fid, mergeid))
+
+            if fid in dead:
+                continue
             if f.t_ed == ted:
                 if f.isignition:
                     allfires.fids_new.append(fid)
@@ -132,27 +215,68 @@ class Allfires:
             allfires.fires[fid] = f
         return allfires
 
-    @timed
-    def update_gdf(self):
+    @property
+    def gdf(self):
+        """Accumulated burning fire records, indexed by (fireID, t)"""
+        if self._gdf_chunks:
+            chunks = [c for c in [self._gdf, *self._gdf_chunks] if len(c) > 0]
+            self._gdf = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+            self._gdf_chunks = []
+        return self._gdf
+
+    @gdf.setter
+    def gdf(self, gdf):
+        for k, tp in singlefire_getdd("all").items():
+            gdf[k] = gdf[k].astype(tp)
+        self._gdf = gdf
+        # rows added by update_gdf, concatenated to the gdf when it is read
+        self._gdf_chunks = []
+        # the heritages list and how many of its entries the rows reflect
+        self._gdf_heritages = None
+
+    def _gdf_rows(self):
+        """Rows of the burning fires at the current time step (one chunk)"""
         dd = singlefire_getdd("all")
         dt = t2dt(self.t)
 
-        for fid, f in self.burningfires.items():
-            if (fid, dt) in self.gdf.index:
-                raise ValueError(f"Error writing gdf: {fid} already at {self.t}")
-
+        fires = self.burningfires
+        cols = {k: [] for k in dd}
+        for f in fires.values():
             for k, tp in dd.items():
                 if tp == "datetime64[ns]":
-                    self.gdf.loc[(fid, dt), k] = t2dt(getattr(f, k))
+                    cols[k].append(t2dt(getattr(f, k)))
                 else:
-                    self.gdf.loc[(fid, dt), k] = getattr(f, k)
+                    cols[k].append(getattr(f, k))
 
+        index = pd.MultiIndex.from_arrays(
+            [list(fires), [dt] * len(fires)], names=["fireID", "t"]
+        )
+        chunk = pd.DataFrame(cols, index=index)
         for k, tp in dd.items():
-            self.gdf[k] = self.gdf[k].astype(tp)
+            chunk[k] = chunk[k].astype(tp)
+        return gpd.GeoDataFrame(chunk, geometry="hull", crs=f"epsg:{settings.EPSG_CODE}")
+
+    @timed
+    def update_gdf(self):
+        dt = t2dt(self.t)
+        chunk = self._gdf_rows()
+        written = [self._gdf] + [c for c in self._gdf_chunks if c.index[0][1] == dt]
+        for fid in chunk.index.get_level_values("fireID"):
+            if any((fid, dt) in gdf.index for gdf in written):
+                raise ValueError(f"Error writing gdf: {fid} already at {self.t}")
 
-        for h0, h1 in self.heritages:
-            if h0 in self.gdf.index:
-                self.gdf.loc[h0, "mergeid"] = h1
+        # heritages added since the last step apply to the existing rows, all
+        # of them to the new rows
+        heritages, n = self._gdf_heritages or (None, 0)
+        if heritages is not self.heritages:
+            n = 0
+        for gdf in (self._gdf, *self._gdf_chunks):
+            _apply_heritages(gdf, self.heritages[n:])
+        _apply_heritages(chunk, self.heritages)
+        self._gdf_heritages = (self.heritages, len(self.heritages))
+
+        if len(chunk) > 0:
+            self._gdf_chunks.append(chunk)
 
     # properties
     @property
@@ -170,10 +294,18 @@ class Allfires:
         """
         return self.t[-1]
 
+    def _fids(self, mask):
+        """List of fire ids in the rows of the fire table selected by mask"""
+        return self.table["fid"][mask].tolist()
+
+    def _subset(self, mask):
+        """dict of the fires in the rows of the fire table selected by mask"""
+        return {i: self.fires[i] for i in self._fids(mask)}
+
     @property
     def fids(self):
         """List of fire ids"""
-        return [i for i, f in self.fires.items()]
+        return list(self.fires)
 
     @property
     def number_of_fires(self):
@@ -183,66 +315,62 @@ class Allfires:
     @property
     def fids_active(self):
         """List of active fire ids"""
-        return [i for i, f in self.fires.items() if f.isactive]
+        return self._fids(self.table.isactive())
 
     @property
     def number_of_activefires(self):
         """Total number of active fires at this time step"""
-        return len(self.fids_active)
+        return int(self.table.isactive().sum())
 
     @property
     def burningfires(self):
         """dict of active fires"""
-        return {i: f for i, f in self.fires.items() if f.isburning}
+        return self._subset(self.table.isburning())
 
     @property
     def activefires(self):
         """dict of active fires"""
-        return {i: f for i, f in self.fires.items() if f.isactive}
+        return self._subset(self.table.isactive())
 
     @property
     def mayactivefires(self):
         """dict of active fires and sleepers"""
-        return {i: f for i, f in self.fires.items() if (f.isactive or f.mayreactivate)}
+        return self._subset(self.table.isactive() | self.table.mayreactivate())
 
     @property
     def deadfires(self):
         """dict of inactive fires not going to be reactivated"""
-        return {
-            i: f for i, f in self.fires.items() if not (f.isactive or f.mayreactivate)
-        }
+        return self._subset(self.table.isdead())
 
     @property
     def fids_dead(self):
         """List of fire ids that is not going to be reactivated"""
-        return [i for i, f in self.fires.items() if not (f.isactive or f.mayreactivate)]
+        return self._fids(self.table.isdead())
 
     @property
     def fids_sleeper(self):
         """List of fire ids that may reactivate"""
-        return [i for i, f in self.fires.items() if f.mayreactivate]
+        return self._fids(self.table.mayreactivate())
 
     @property
     def number_of_sleeper(self):
         """Total number of sleep fires at this time step"""
-        return len(self.fids_sleeper)
+        return int(self.table.mayreactivate().sum())
 
     @property
     def fids_valid(self):
         """List of valid (non-invalid) fire ids"""
-        # return [self.fires[f].fireID for f in self.fires if self.fires[f].invalid is False]
-        return [i for i, f in self.fires.items() if f.invalid is False]
+        return self._fids(self.table.isvalid())
 
     @property
     def number_of_validfires(self):
         """Total number of valid fires at this time step"""
-        return len(self.fids_valid)
+        return int(self.table.isvalid().sum())
 
     @property
     def validfires(self):
         """List of valid fires"""
-        # return [self.fires[fid] for fid in self.fids_valid]
-        return {i: f for i, f in self.fires.items() if f.invalid is False}
+        return self._subset(self.table.isvalid())
 
     @property
     def fids_updated(self):
@@ -284,8 +412,7 @@ class Allfires:
         t : tuple, (int,int,int,str)
             the year, month, day and 'AM'|'PM'
         """
-        for i, f in self.fires.items():
-            f.t = list(t)
+        self.table["hd"][:] = t2hd(t)
 
     def cleanup(self, t):
         """Clean up Allfires obj at each time step
@@ -382,6 +509,354 @@ class Allfires:
                 # add the fire id into the fids_invalid list
                 self.fids_invalid.append(f.fireID)
 
+    @timed
+    def evict_deadfires(self):
+        """Drop the Fire objects (and their geometries) of fires that have
+        been inactive for more than limoffdays. They keep their fire table
+        row, so status queries are unchanged, and are rebuilt from their gdf
+        history if looked up again.
+        """
+        table = self.table
+        crossed = (
+            table["live"]
+            & table["loaded"]
+            & (table.t_inactive() > settings.limoffdays)
+        )
+        for fid in self._fids(crossed):
+            f = self.fires[fid]
+            if self.allpixels is None:
+                self.allpixels = f.allpixels
+            self.fires.evict(fid, partial(self._reload_fire, rows=f._rows))
+
+    def _reload_fire(self, fid, rows=None):
+        """Rebuild an evicted fire at the current t from its gdf rows (rows:
+        row positions of its pixels, found with a scan of allpixels if None)"""
+        return fire_from_gdf(fid, self.gdf.loc[[fid]], self.t, self.allpixels, {fid: rows})
+
+    def update_allpixels(self, allpixels):
+        """Make the fires read their pixels from a new allpixels frame, which
+        starts with the rows of the current one (so that the row positions
+        of the fires' pixels stay valid)
+        """
+        self.allpixels = allpixels
+        for f in self.fires.built():
+            f.allpixels = allpixels
+
+
+class FireTable:
+    """Struct-of-arrays state of a set of fires, one row per fire
+
+    Fire objects read and write their id, time steps, validity, merge id and
+    fire type through a row of a FireTable, so that the Allfires status
+    queries are evaluated as NumPy masks over all fires at once.
+    """
+
+    dtypes = {
+        "fid": np.int64,
+        "hd": np.int64,  # current time step (half-day index)
+        "hd_st": np.int64,  # time step of the first detection
+        "hd_ed": np.int64,  # time step of the last detection
+        "invalid": bool,
+        "mergeid": np.int64,
+        "ftype": np.int64,
+        "live": bool,  # False for rows of fires removed from the table
+        "loaded": bool,  # False while the Fire object is not built (lazy)
+    }
+    flags = ("live", "loaded")
+
+    def __init__(self, capacity=16):
+        # the FireDict whose table this is (None for the table of one fire)
+        self.owner = None
+        self.n = 0
+        self.cols = {k: np.zeros(capacity, dtype=tp) for k, tp in self.dtypes.items()}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, k):
+        """Column k of the used rows (a view)"""
+        return self.cols[k][: self.n]
+
+    def append(self, **values):
+        """Add a live row and return its position
+
+        Parameters
+        ----------
+        values : dict
+            column values of the row (other columns are 0/False)
+
+        Returns
+        -------
+        row : int
+            row position
+        """
+        capacity = len(self.cols["fid"])
+        if self.n == capacity:
+            for k, col in self.cols.items():
+                self.cols[k] = np.concatenate([col, np.zeros_like(col, shape=capacity)])
+        row = self.n
+        self.n += 1
+        self.assign(row, live=True, **values)
+        return row
+
+    def assign(self, row, **values):
+        """Set column values of a row"""
+        for k, col in self.cols.items():
+            col[row] = values.get(k, 0)
+
+    def values(self, row):
+        """Column values (except flags) of a row as python scalars"""
+        return {
+            k: col[row].item() for k, col in self.cols.items() if k not in self.flags
+        }
+
+    # status masks, same definitions as the Fire properties
+    def t_inactive(self):
+        return (self["hd"] - self["hd_ed"]) / 2
+
+    def isburning(self):
+        return self["live"] & (self.t_inactive() == 0)
+
+    def isvalid(self):
+        return self["live"] & ~self["invalid"]
+
+    def isactive(self):
+        return self.isvalid() & (self.t_inactive() <= settings.maxoffdays)
+
+    def mayreactivate(self):
+        t_inactive = self.t_inactive()
+        return (
+            self.isvalid()
+            & (t_inactive > settings.maxoffdays)
+            & (t_inactive <= settings.limoffdays)
+        )
+
+    def isdead(self):
+        """not (isactive or mayreactivate), as used for Allfires.deadfires"""
+        return self["live"] & ~(self.isactive() | self.mayreactivate())
+
+
+class FireDict(MutableMapping):
+    """dict of Fire objects (fireID as the key) backed by a FireTable
+
+    A fire added to a FireDict moves its state into a row of the dict's
+    table; a fire removed (or replaced) gets its own one-row table back. A
+    fire of another FireDict is added as a copy, so it stays in the other.
+    """
+
+    def __init__(self, fires=None):
+        self._fires = {}
+        self.table = FireTable()
+        self.table.owner = self
+        if fires:
+            self.update(fires)
+
+    def __getitem__(self, fid):
+        f = self._fires[fid]
+        if isinstance(f, _LazyFire):
+            row = f._row
+            f = f.load(fid)
+            f._bind(self.table, row)
+            self.table.cols["loaded"][row] = True
+            self._fires[fid] = f
+        return f
+
+    def view(self, fid):
+        """The Fire object of fid if built, else a view of its FireTable row
+        (see _FireRow) that does not build it"""
+        f = self._fires[fid]
+        return _FireRow(self.table, f._row) if isinstance(f, _LazyFire) else f
+
+    def built(self):
+        """List of the Fire objects that are built (not lazy)"""
+        return [f for f in self._fires.values() if not isinstance(f, _LazyFire)]
+
+    def loaded(self, fid):
+        """Whether the Fire object of fid is built"""
+        return not isinstance(self._fires[fid], _LazyFire)
+
+    def __contains__(self, fid):
+        return fid in self._fires
+
+    def add_lazy(self, fid, values, load):
+        """Add a fire by its FireTable values; its Fire object is built by
+        load(fid) on first access (and then views the same row)
+        """
+        self._fires[fid] = _LazyFire(self.table.append(**values), load)
+
+    def evict(self, fid, load):
+        """Drop the Fire object of fid, keeping its FireTable row; it is
+        rebuilt by load(fid) on next access (see add_lazy)
+        """
+        row = self._fires[fid]._row
+        self.table.cols["loaded"][row] = False
+        self._fires[fid] = _LazyFire(row, load)
+
+    def __setitem__(self, fid, f):
+        if self._fires.get(fid) is f:
+            return
+        if f._table.owner is not None and f._table.owner is not self:
+            f = copy.copy(f)
+        values = f._values()
+        if fid in self._fires:
+            # replacing keeps the position of the key and its row
+            old = self._fires[fid]
+            row = old._row
+            old._detach()
+            self.table.assign(row, live=True, **values)
+        else:
+            row = self.table.append(**values)
+        self.table.cols["loaded"][row] = True
+        f._bind(self.table, row)
+        self._fires[fid] = f
+
+    def __delitem__(self, fid):
+        f = self._fires.pop(fid)
+        self.table.cols["live"][f._row] = False
+        f._detach()
+
+    def __iter__(self):
+        return iter(self._fires)
+
+    def __len__(self):
+        return len(self._fires)
+
+    def __repr__(self):
+        return repr(self._fires)
+
+
+class _LazyFire:
+    """Placeholder in a FireDict for a fire not yet built (see add_lazy)"""
+
+    def __init__(self, row, load):
+        self._row = row
+        self.load = load
+
+    def _detach(self):
+        pass
+
+    def __repr__(self):
+        return f"<lazy Fire at row {self._row}>"
+
+
+class _TableField:
+    """Fire attribute stored in a column of the fire's FireTable row"""
+
+    def __init__(self, col):
+        self.col = col
+
+    def __get__(self, f, owner=None):
+        if f is None:
+            return self
+        return f._table.cols[self.col][f._row].item()
+
+    def __set__(self, f, v):
+        f._table.cols[self.col][f._row] = v
+
+
+def fire_from_gdf(fid, gdf_fid, t, allpixels, rows_by_fid):
+    """Build the Fire object of a fire at t from its rows in the allfires gdf
+
+    Parameters
+    ----------
+    fid : int
+        fire id
+    gdf_fid : geodataframe
+        rows of the fire in the allfires gdf, indexed by (fireID, t)
+    t : tuple, (int,int,int,str)
+        the year, month, day and 'AM'|'PM'
+    allpixels : dataframe
+        all fire pixels
+    rows_by_fid : dict
+        fire id -> row positions of its pixels (see group_pixel_rows)
+
+    Returns
+    -------
+    f : Fire object
+    """
+    f = Fire(fid, t, allpixels)
+    f._rows = rows_by_fid.get(fid, np.empty(0, dtype=np.intp))
+    dt_st = gdf_fid.t_st.min()
+    dt_ed = gdf_fid.t_ed.max()
+
+    if len(gdf_fid) > 1:
+        f.fline_prior = gdf_fid.iloc[-2].fline
+
+    gdf_fid_t = gdf_fid.loc[(fid, dt_ed)]
+    for k, v in gdf_fid_t.items():
+        if not isinstance(getattr(Fire, k, None), property):
+            setattr(f, k, v)
+
+    f.t_st = dt2t(dt_st)
+    f.t_ed = dt2t(dt_ed)
+    return f
+
+
+def fire_values_from_gdf(gdf, t_ed, t):
+    """FireTable values of fires at t, read from the allfires gdf without
+    building Fire objects
+
+    Parameters
+    ----------
+    gdf : geodataframe
+        allfires gdf, indexed by (fireID, t)
+    t_ed : series
+        datetime of the last time step, indexed by fire id
+    t : tuple, (int,int,int,str)
+        the year, month, day and 'AM'|'PM'
+
+    Returns
+    -------
+    values : dict
+        fire id -> dict of FireTable column values
+    """
+    last = gdf.loc[pd.MultiIndex.from_arrays([t_ed.index, t_ed.values])]
+    cols = {
+        "fid": t_ed.index.values,
+        "hd_st": dt2hd(gdf.t_st.groupby(level=0).min()[t_ed.index].values),
+        "hd_ed": dt2hd(t_ed.values),
+        "invalid": last.invalid.values,
+        "mergeid": last.mergeid.values,
+        "ftype": last.ftype.values,
+    }
+    hd = t2hd(t)
+    return {
+        fid: {"hd": hd, **{k: v[i].item() for k, v in cols.items()}}
+        for i, fid in enumerate(t_ed.index.tolist())
+    }
+
+
+def _apply_heritages(gdf, heritages):
+    """Set mergeid of the gdf rows of each (source, target) heritage to target"""
+    if len(heritages) == 0 or len(gdf) == 0:
+        return
+    mergeids = dict(heritages)  # later heritages of a source win
+    fids = gdf.index.get_level_values("fireID")
+    has_heritage = fids.isin(list(mergeids))
+    if has_heritage.any():
+        gdf.loc[has_heritage, "mergeid"] = (
+            fids[has_heritage].map(mergeids).astype(gdf["mergeid"].dtype)
+        )
+
+
+def group_pixel_rows(allpixels):
+    """Map each fire id to the row positions of its pixels in allpixels
+
+    Parameters
+    ----------
+    allpixels : dataframe
+        all fire pixels, with "fid" and "t" columns
+
+    Returns
+    -------
+    rows_by_fid : dict
+        fire id -> int array of row positions, sorted by t (ties keep row order)
+    """
+    fids = allpixels["fid"].values
+    order = np.lexsort((allpixels["t"].values, fids))
+    ufids, starts = np.unique(fids[order], return_index=True)
+    return dict(zip(ufids.tolist(), np.split(order, starts[1:])))
+
 
 # b. Object - Fire
 class Fire:
@@ -399,16 +874,32 @@ class Fire:
         allpixels : dataframe
             a mutating dataframe of all fire pixels for the period of interest
         """
+        # id, time steps, validity, merge id and fire type live in a FireTable
+        # row; a fire owns a one-row table until it is added to an Allfires
+        self._table = FireTable(capacity=1)
+        self._row = self._table.append()
+
         # initialize fire id and sensor
         self._fid = id
         self.mergeid = id  # mergeid is the final fire id the current fire being merged; use current fire id at initialization
         self.sensor = settings.FIRE_SENSOR
         self.allpixels = allpixels
 
+        # row positions of this fire's pixels in allpixels, sorted by t; a new
+        # fire has none yet (None for fires rebuilt from saved state without
+        # them, found with a full scan on first use, see fire_from_gdf)
+        self._rows = np.empty(0, dtype=np.intp)
+        # bumped whenever pixels are assigned to this fire or taken from it
+        # (see pixels_taken), keys the memoized properties
+        self._pixel_version = 0
+
+        # memoized derived properties (see _cached) and the state they hold for
+        self._cache = {}
+        self._cache_state = None
+
         # initialize current time, fire start time, and fire final time
-        tlist = list(t)  # convert (y,m,d,ampm) to [y,m,d,ampm]
-        self.t = tlist  # current time
-        self.t_ed = tlist
+        self.t = t  # current time
+        self.t_ed = t
 
         # fline of latest active timestep, used for sleeper threshold
         self.fline_prior = None
@@ -425,6 +916,85 @@ class Fire:
     def __repr__(self):
         return f"<Fire {self.fireID} at={self.t} with n_pixels={self.n_pixels}"
 
+    _fid = _TableField("fid")
+    hd = _TableField("hd")
+    hd_st = _TableField("hd_st")
+    hd_ed = _TableField("hd_ed")
+    invalid = _TableField("invalid")
+    mergeid = _TableField("mergeid")
+    ftype = _TableField("ftype")
+
+    def _values(self):
+        """FireTable column values of this fire"""
+        return self._table.values(self._row)
+
+    def _bind(self, table, row):
+        self._table = table
+        self._row = row
+
+    def _detach(self):
+        """Move the state of this fire to its own one-row table"""
+        table = FireTable(capacity=1)
+        self._bind(table, table.append(**self._values()))
+
+    def __copy__(self):
+        """Shallow copy with its own one-row table and property cache"""
+        f = type(self).__new__(type(self))
+        f.__dict__.update(self.__dict__)
+        f._detach()
+        f._cache = {}
+        f._cache_state = None
+        return f
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_table"], state["_row"]
+        state.update(self._values())
+        return state
+
+    def __setstate__(self, state):
+        # objects pickled before the half-day index stored t, t_st, t_ed lists
+        for k in ("t", "t_st", "t_ed"):
+            if k in state:
+                state["hd" + k[1:]] = t2hd(state.pop(k))
+        if "_fid" in state:
+            state["fid"] = state.pop("_fid")
+        values = {k: state.pop(k) for k in FireTable.dtypes if k in state}
+        # objects pickled before the pixel index find their pixels with a scan
+        state.setdefault("_rows", None)
+        self.__dict__.update(state)
+        self._table = FireTable(capacity=1)
+        self._row = self._table.append(**values)
+
+    # times are stored as integer half-day indexes (hd, hd_st, hd_ed) and
+    # exposed as [y,m,d,ampm] lists
+    @property
+    def t(self):
+        """Current time step"""
+        return hd2t(self.hd)
+
+    @t.setter
+    def t(self, t):
+        self.hd = t2hd(t)
+
+    @property
+    def t_st(self):
+        """Time step of the first active fire detection"""
+        return hd2t(self.hd_st)
+
+    @t_st.setter
+    def t_st(self, t):
+        self.hd_st = t2hd(t)
+
+    @property
+    def t_ed(self):
+        """Time step of the last active fire detection"""
+        return hd2t(self.hd_ed)
+
+    @t_ed.setter
+    def t_ed(self, t):
+        self.hd_ed = t2hd(t)
+
     @property
     def cday(self):
         """Current day (datetime date)"""
@@ -443,14 +1013,12 @@ class Fire:
     @property
     def duration(self):
         """Time difference between first and last active fire detection"""
-        duration = t_dif(self.t_st, self.t_ed)  # + 0.5
-        return duration
+        return (self.hd_ed - self.hd_st) / 2
 
     @property
     def t_inactive(self):
         """Time difference between current time and the last active fire detection"""
-        t_inactive = t_dif(self.t_ed, self.t)
-        return t_inactive
+        return (self.hd - self.hd_ed) / 2
 
     @property
     def isburning(self):
@@ -488,22 +1056,85 @@ class Fire:
         """Is the current timestep the ignition?
         when start time == end time; and new pixel > 0
         """
-        return self.t == self.t_st
+        return self.hd == self.hd_st
 
     @property
     def fireID(self):
         return self._fid
 
+    @fireID.setter
+    def fireID(self, id):
+        self._fid = id
+
+    def _pixel_rows(self):
+        """Row positions of the pixels of this fire in allpixels, sorted by t"""
+        fids = self.allpixels["fid"].values
+        if self._rows is None:
+            rows = np.flatnonzero(fids == self.fireID)
+            rows = rows[np.argsort(self.allpixels["t"].values[rows], kind="stable")]
+        else:
+            # pixels taken over by another fire (merging) no longer belong here
+            rows = self._rows[fids[self._rows] == self.fireID]
+        self._rows = rows
+        return rows
+
+    def _rows_at(self, hd, upto=False):
+        """Row positions of the pixels at hd (or at and before hd if upto)"""
+        rows = self._pixel_rows()
+        if len(rows) == 0:
+            return rows
+        ts = self.allpixels["t"].values[rows]
+        dt = hd2dt(hd)
+        hi = np.searchsorted(ts, dt, side="right")
+        lo = 0 if upto else np.searchsorted(ts, dt, side="left")
+        return rows[lo:hi]
+
+    def _take(self, rows):
+        """Select rows of allpixels, keeping the allpixels row order"""
+        return self.allpixels.iloc[np.sort(rows)]
+
     @property
     def pixels(self):
-        return self.allpixels[
-            (self.allpixels["fid"] == self.fireID)
-            & (self.allpixels["t"] <= t2dt(self.t))
-        ]
+        return self._take(self._rows_at(self.hd, upto=True))
 
     @pixels.setter
     def pixels(self, pixels):
-        self.allpixels.loc[pixels.index, "fid"] = self.fireID
+        pos = self.allpixels.index.get_indexer_for(pixels.index)
+        if (pos < 0).any():
+            missing = pixels.index[pos < 0].tolist()
+            raise ValueError(f"pixels not in allpixels for fire {self.fireID}: {missing[:5]}")
+        self.allpixels.iloc[pos, self.allpixels.columns.get_loc("fid")] = self.fireID
+        rows = np.union1d(self._pixel_rows(), pos)
+        self._rows = rows[np.argsort(self.allpixels["t"].values[rows], kind="stable")]
+        self._pixel_version += 1
+
+    def pixels_taken(self):
+        """Record that another fire took over pixels of this fire (merging),
+        so that the memoized properties are computed again"""
+        self._pixel_version += 1
+
+    def _cached(self, name, func):
+        """Return the memoized value of a derived property, computing it with
+        func if t, hull or the pixels of the fire have changed since it was stored.
+        Pixels can only be added through the pixels setter or taken away by
+        another fire (see pixels_taken), both bump _pixel_version.
+        """
+        hull = getattr(self, "hull", None)
+        state = (self.hd, self._pixel_version)
+        if (
+            self._cache_state is None
+            or self._cache_state[0] != state
+            or self._cache_state[1] is not hull
+        ):
+            self._cache = {}
+            self._cache_state = (state, hull)
+
+        if name in self._cache:
+            property_cache_stats["hits"] += 1
+        else:
+            property_cache_stats["misses"] += 1
+            self._cache[name] = func()
+        return self._cache[name]
 
     @property
     def locs(self):
@@ -524,14 +1155,11 @@ class Fire:
     @property
     def n_pixels(self):
         """Total number of fire pixels"""
-        return len(self.pixels)
+        return self._cached("n_pixels", lambda: len(self._rows_at(self.hd, upto=True)))
 
     @property
     def newpixels(self):
-        return self.allpixels[
-            (self.allpixels["fid"] == self.fireID)
-            & (self.allpixels["t"] == t2dt(self.t))
-        ]
+        return self._take(self._rows_at(self.hd))
 
     @property
     def newlocs(self):
@@ -568,14 +1196,11 @@ class Fire:
     @property
     def n_newpixels(self):
         """Total number of new fire pixels"""
-        return len(self.newpixels)
+        return self._cached("n_newpixels", lambda: len(self._rows_at(self.hd)))
 
     @property
     def ignpixels(self):
-        return self.allpixels[
-            (self.allpixels["fid"] == self.fireID)
-            & (self.allpixels["t"] == t2dt(self.t_st))
-        ]
+        return self._take(self._rows_at(self.hd_st))
 
     @property
     def ignition_center_geo(self):
@@ -587,6 +1212,9 @@ class Fire:
     @property
     def farea(self):
         """Fire spatial size of the fire event (km2)"""
+        return self._cached("farea", self._farea)
+
+    def _farea(self):
         # get hull
         fhull = self.hull
 
@@ -600,6 +1228,9 @@ class Fire:
     @property
     def pixden(self):
         """Fire pixel density (number of pixels per km2 fire area)"""
+        return self._cached("pixden", self._pixden)
+
+    def _pixden(self):
         farea = self.farea
         if farea > 0:
             return self.n_pixels / farea
@@ -614,6 +1245,9 @@ class Fire:
     @property
     def fperim(self):
         """Perimeter length of fire hull"""
+        return self._cached("fperim", self._fperim)
+
+    def _fperim(self):
         fhull = self.hull
 
         if fhull is None:
@@ -625,12 +1259,10 @@ class Fire:
     @property
     def extpixels(self):
         """External pixels at the previous active timestep + new pixels"""
-        return self.allpixels[
-            (self.allpixels["fid"] == self.fireID)
-            & (
-                (self.allpixels["ext_until"] >= t2dt(self.t_ed))
-                | (self.allpixels["t"] == t2dt(self.t))
-            )
+        pixels = self._take(self._pixel_rows())
+        return pixels[
+            (pixels["ext_until"] >= t2dt(self.t_ed))
+            | (pixels["t"] == t2dt(self.t))
         ]
 
     @extpixels.setter
@@ -661,7 +1293,7 @@ class Fire:
     @property
     def meanFRP(self):
         """Mean FRP of the new fire pixels"""
-        return self.newpixels.FRP.mean()
+        return self._cached("meanFRP", lambda: self.newpixels.FRP.mean())
 
     @property
     def flinelen(self):
@@ -731,3 +1363,14 @@ class Fire:
 
         # we save the fire line to a new property (this is only updated when fline not None)
         self.fline_prior = self.fline
+
+
+class _FireRow(Fire):
+    """Fire attributes kept in the FireTable row of a fire not built (ids,
+    time steps and status); its pixels and geometries are not available"""
+
+    def __init__(self, table, row):
+        self._bind(table, row)
+
+    def __repr__(self):
+        return f"<Fire {self.fireID} row at={self.t}>"
@@ -1,6 +1,7 @@
 import json
 import argparse
 import os
+import time
 import glob
 from functools import partial
 
@@ -16,7 +17,10 @@ from fireatlas.utils import timed
 from fireatlas.postprocess import (
     all_dir,
     allfires_filepath,
+    allfires_partition_filepath,
     allpixels_filepath,
+    allpixels_partition_filepath,
+    manifest_filepath,
     save_snapshots,
     find_largefires,
     save_large_fires_layers,
@@ -26,7 +30,7 @@ from fireatlas.postprocess import (
 )
 from fireatlas.preprocess import (
     check_preprocessed_file,
-    preprocessed_filename,
+    find_preprocessed_file,
     preprocess_input_file,
     preprocess_region_t,
     preprocess_region,
@@ -64,8 +68,7 @@ def get_timesteps_needing_region_t_processing(
 ):
     needs_processing = []
     for t in t_generator(tst, ted):
-        filepath = preprocessed_filename(t, sat=sat, region=region)
-        if not settings.fs.exists(filepath):
+        if find_preprocessed_file(t, sat=sat, region=region) is None:
             needs_processing.append(t)
 
     if force:
@@ -84,9 +87,18 @@ def job_fire_forward(client: Client, region: Region, tst: TimeStep, ted: TimeSte
     logger.info(f"Running FireForward code for {region[0]} from {tst} to {ted} with source {settings.FIRE_SOURCE}")
 
     try:
+        job_start = time.time()
         allfires, allpixels, t_saved = Fire_Forward(tst=tst, ted=ted, region=region, restart=False)
+        # allpixels and allfires partitions written by this run
+        for t in t_generator(tst, ted):
+            for partition_filepath in [allpixels_partition_filepath, allfires_partition_filepath]:
+                filepath = partition_filepath(tst, t, region, location="local")
+                if os.path.exists(filepath) and os.path.getmtime(filepath) >= job_start:
+                    copy_from_local_to_s3(filepath, fs)
         copy_from_local_to_s3(allpixels_filepath(tst, ted, region, location="local"), fs)
         copy_from_local_to_s3(allfires_filepath(tst, ted, region, location="local"), fs)
+        # the manifest last, so that it only lists saves already uploaded
+        copy_from_local_to_s3(manifest_filepath(tst, region, location="local"), fs)
         allfires_gdf = allfires.gdf
         if t_saved is None:
             # NOTE: this happens if we're running a region full-on
@@ -230,7 +242,10 @@ def Run(region: Region, tst: TimeStep, ted: TimeStep, copy_to_veda: bool):
     # uploads raw satellite files from `job_data_update_checker` in parallel
     data_upload_futures = client.map(
         partial(copy_from_local_to_s3, fs=fs),
-        glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.txt")
+        [
+            *glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.txt"),
+            *glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.parq"),
+        ]
     )
     # block until half-day timesteps and region are on s3
     timed(client.gather, text=f"Dask upload of {len(data_upload_futures) + 1} files")([*data_upload_futures, region_future])
@@ -10,12 +10,93 @@ The following functions are used to convert times between different formats.
     d : date, date()
     ampm : ampm, str()
     dt : time steps, datetime()
+    hd : time steps, int (half days since 1970-01-01 AM)
 
 """
 
 from datetime import date, timedelta, datetime
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 
+# ordinal of the first day of the half-day index (hd 0 is 1970-01-01 AM)
+HD_EPOCH = date(1970, 1, 1).toordinal()
+AMPM = ("AM", "PM")
+
+
+@lru_cache(maxsize=None)
+def _ymdampm2hd(year, month, day, ampm):
+    return 2 * (date(year, month, day).toordinal() - HD_EPOCH) + AMPM.index(ampm)
+
+
+@lru_cache(maxsize=None)
+def _hd2ymdampm(hd):
+    d = date.fromordinal(hd // 2 + HD_EPOCH)
+    return (d.year, d.month, d.day, AMPM[hd % 2])
+
+
+def t2hd(t):
+    """convert a t tuple to the integer half-day index
+    Parameters
+    ----------
+    t : tuple, (int,int,int,str)
+        the year, month, day and 'AM'|'PM'
+
+    Returns
+    -------
+    hd : int
+        number of half days since 1970-01-01 AM
+    """
+    return _ymdampm2hd(*t)
+
+
+def hd2t(hd):
+    """convert an integer half-day index to a t tuple
+    Parameters
+    ----------
+    hd : int
+        number of half days since 1970-01-01 AM
+
+    Returns
+    -------
+    t : list, (int,int,int,str)
+        the year, month, day and 'AM'|'PM'
+    """
+    return list(_hd2ymdampm(int(hd)))
+
+
+def dt2hd(dt):
+    """convert datetime(s) to the integer half-day index
+    Parameters
+    ----------
+    dt : datetime, datetime64 or array-like of those
+        time steps (hour 0 for 'AM', 12 for 'PM')
+
+    Returns
+    -------
+    hd : int or np.array of int64
+        number of half days since 1970-01-01 AM
+    """
+    hd = np.asarray(dt, dtype="datetime64[h]").astype(np.int64) // 12
+    return int(hd) if hd.ndim == 0 else hd
+
+
+def hd2dt(hd):
+    """convert integer half-day index(es) to datetime64
+    Parameters
+    ----------
+    hd : int or array-like of int
+        number of half days since 1970-01-01 AM
+
+    Returns
+    -------
+    dt : np.datetime64 or np.array of datetime64[ns]
+        time steps (hour 0 for 'AM', 12 for 'PM')
+    """
+    return (np.asarray(hd, dtype=np.int64) * 12).astype("datetime64[h]").astype(
+        "datetime64[ns]"
+    )[()]
+
 
 def t_nb(t, nb="next"):
     """Calculate the next or previous time step (year, month, day, ampm)
@@ -32,35 +113,18 @@ def t_nb(t, nb="next"):
         the year, month, day and 'AM'|'PM' for next/previous time
     """
 
-    # the next time step
     if nb == "next":
-        # if current time is 'AM', set next time as the current day and 'PM'
-        if t[-1] == "AM":
-            t_out = list(t[:-1])
-            t_out.append("PM")
-        # if current time is 'PM', set next time as the following day and 'AM'
-        else:
-            d = date(*t[:-1])
-            d_out = d + timedelta(days=1)
-            t_out = [d_out.year, d_out.month, d_out.day, "AM"]
-
-    # the previous time step
+        t_out = hd2t(t2hd(t) + 1)
     elif nb == "previous":
-        # if current time is 'PM', set previous time as the current day and 'AM'
-        if t[-1] == "PM":
-            t_out = list(t[:-1])
-            t_out.append("AM")
-        # if current time is 'AM', set previous time as the previous day and 'PM'
-        else:
-            d = date(*t[:-1])
-            d_out = d + timedelta(days=-1)
-            t_out = [d_out.year, d_out.month, d_out.day, "PM"]
+        t_out = hd2t(t2hd(t) - 1)
     return t_out
 
 
 def t_generator(t_st, t_ed):
+    # compare half-day indexes, so that t_st and t_ed may be tuples or lists
     t = t_st
-    while t_ed != t:
+    hd_ed = t2hd(t_ed)
+    while t2hd(t) < hd_ed:
         yield t
         t = t_nb(t, nb="next")
     yield t
@@ -80,17 +144,8 @@ def t_dif(t1, t2):
     dt : float
         time difference in days (t2-t1), half day as 0.5
     """
-    # calculate the day difference
-    d1 = date(*t1[:-1])
-    d2 = date(*t2[:-1])
-    dt = (d2 - d1).days
-
-    # adjust according to ampm difference
-    if t1[-1] != t2[-1]:
-        if t1[-1] == "PM":
-            dt -= 0.5
-        else:
-            dt += 0.5
+    hd = t2hd(t2) - t2hd(t1)
+    dt = hd // 2 if hd % 2 == 0 else hd / 2
     return dt
 
 
@@ -3,17 +3,27 @@ This is the module used for vector related calculations
 """
 
 import math
+import numpy as np
+import pandas as pd
 import geopandas as gpd
-import shapely.geometry as geometry
+import shapely
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-from shapely.ops import unary_union, polygonize
 from shapely.geometry import Polygon, MultiPoint, MultiLineString
 
+from scipy import ndimage
 from scipy.spatial import Delaunay, ConvexHull
 
 from fireatlas import settings
 
 
+# pixels passed to cal_hull and pruned before the hull calculation (reset at
+# each time step; hulls calculated on a process pool are not counted)
+hull_prune_stats = Counter()
+
+
 def doConcH(points, alpha):
     """
     Compute the alpha shape (concave hull) of a set
@@ -29,58 +39,41 @@ def doConcH(points, alpha):
         don't fall inward as much as larger numbers.
         Too large, and you lose everything!
     source: http://blog.thehumangeo.com/2014/05/12/drawing-boundaries-in-python/
-    """
 
-    def add_edge(edges, edge_points, coords, i, j):
-        """
-        Add a line between the i-th and j-th points,
-        if not in the list already
-        """
-        if (i, j) in edges or (j, i) in edges:
-            # already added
-            return
-        edges.add((i, j))
-        edge_points.append(coords[[i, j]])
-
-    coords = points
+    All Delaunay triangles are filtered at once by circumradius, and the kept
+    triangles are merged with a coverage union. Holes fully enclosed by kept
+    triangles are filled, as polygonizing the kept edges would do.
+    """
+    coords = np.asarray(points, dtype=np.float64)
     tri = Delaunay(coords)
-    edges = set()
-    edge_points = []
-
-    # loop over triangles:
-    for ia, ib, ic in tri.simplices:
-        pa = coords[ia]
-        pb = coords[ib]
-        pc = coords[ic]
-        # Lengths of sides of triangle
-        a = math.sqrt((pa[0] - pb[0]) ** 2 + (pa[1] - pb[1]) ** 2)
-        b = math.sqrt((pb[0] - pc[0]) ** 2 + (pb[1] - pc[1]) ** 2)
-        c = math.sqrt((pc[0] - pa[0]) ** 2 + (pc[1] - pa[1]) ** 2)
-        # Semiperimeter of triangle
-        s = (a + b + c) / 2.0
-
-        # Area of triangle by Heron's formula
-        try:
-            area = math.sqrt(s * (s - a) * (s - b) * (s - c))
-        except:
-            area = 0
-
-        if area > 0:  # modified by YC
-            circum_r = a * b * c / (4.0 * area)
-        else:
-            circum_r = 0
-        # Here's the radius filter.
-        # print circum_r
-        # if circum_r < 1.0/alpha:
-        if circum_r < alpha:
-            add_edge(edges, edge_points, coords, ia, ib)
-            add_edge(edges, edge_points, coords, ib, ic)
-            add_edge(edges, edge_points, coords, ic, ia)
-    m = geometry.MultiLineString(edge_points)
-    triangles = list(polygonize(m))
-
-    # return triangles
-    return unary_union(triangles)
+    simplices = tri.simplices
+
+    pa = coords[simplices[:, 0]]
+    pb = coords[simplices[:, 1]]
+    pc = coords[simplices[:, 2]]
+    # Lengths of sides of triangles
+    a = np.sqrt((pa[:, 0] - pb[:, 0]) ** 2 + (pa[:, 1] - pb[:, 1]) ** 2)
+    b = np.sqrt((pb[:, 0] - pc[:, 0]) ** 2 + (pb[:, 1] - pc[:, 1]) ** 2)
+    c = np.sqrt((pc[:, 0] - pa[:, 0]) ** 2 + (pc[:, 1] - pa[:, 1]) ** 2)
+    # Semiperimeter of triangles
+    s = (a + b + c) / 2.0
+
+    # Area of triangles by Heron's formula (0 for degenerate triangles)
+    prod = s * (s - a) * (s - b) * (s - c)
+    area = np.sqrt(np.where(prod > 0, prod, 0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        circum_r = np.where(area > 0, a * b * c / (4.0 * area), 0)
+
+    # Here's the radius filter; degenerate triangles add no area
+    keep = (circum_r < alpha) & (area > 0)
+    triangles = shapely.polygons(coords[simplices[keep]])
+
+    # merge the triangles and fill the enclosed holes
+    parts = shapely.get_parts(shapely.coverage_union_all(triangles))
+    filled = shapely.polygons(shapely.get_exterior_ring(parts))
+
+    return shapely.union_all(filled)
 
 
 def doConvH(locs):
@@ -106,23 +99,81 @@ def doConvH(locs):
     return hull
 
 
-def cal_hull(locs):
+def hull_buffer():
+    """the buffer (m) added around hulls, depending on the fire sensor"""
+    if settings.FIRE_SENSOR == "viirs":
+        return settings.VIIRSbuf
+    elif settings.FIRE_SENSOR == "mcd64":
+        return settings.MCD64buf
+
+
+def prune_hull_pixels(locs):
+    """drop fire pixels before the hull is calculated.
+        the pruning method is set with `settings.hull_prune_opt`
+    Parameters
+    ----------
+    locs : np.array (nx2)
+        x, y values of all fire pixels
+    Returns
+    -------
+    locs : np.array (mx2)
+        x, y values of the remaining fire pixels
+    n_pruned : int
+        number of pixels dropped
+    """
+    nfp = len(locs)
+
+    if settings.hull_prune_opt == "interior" and nfp > 0:
+        # drop the pixels of the grid cells (of valpha/2) whose neighbours two
+        # cells deep, diagonal ones included, all hold pixels. The kept pixels
+        # form a band at least valpha wide around each dropped area, whose alpha
+        # shape triangles enclose the area (filled by doConcH, as it is covered
+        # or enclosed without pruning), so the hull is unchanged
+        depth = 2
+        cells = np.floor(locs / (settings.valpha / 2)).astype(np.int64)
+        cells -= cells.min(axis=0) - depth
+        occupied = np.zeros(cells.max(axis=0) + depth + 1, dtype=bool)
+        occupied[cells[:, 0], cells[:, 1]] = True
+        interior = ndimage.binary_erosion(
+            occupied, structure=np.ones((2 * depth + 1, 2 * depth + 1), dtype=bool)
+        )
+        locs = locs[~interior[cells[:, 0], cells[:, 1]]]
+
+    elif settings.hull_prune_opt == "grid":
+        # keep one pixel per grid cell (approximate, the hull can shrink slightly)
+        cellsize = settings.hull_prune_grid_frac * settings.valpha
+        cells = np.floor(locs / cellsize).astype(np.int64)
+        _, first = np.unique(cells, axis=0, return_index=True)
+        locs = locs[np.sort(first)]
+
+    return locs, nfp - len(locs)
+
+
+def cal_hull(locs, prune=True):
     """wrapper to calculate the hull given fire locations.
         the returned hull type depends on the pixel number
     Parameters
     ----------
     locs : np.array (nx2)
         x, y values of all fire pixels
+    prune : bool
+        drop pixels first, as set by `settings.hull_prune_opt` (see
+        `prune_hull_pixels`)
     Returns
     -------
     hull : object
         calculated hull (a buffer of VIIRS half pixel size included)
     """
     # set buffer according to sensor
-    if settings.FIRE_SENSOR == "viirs":
-        buf = settings.VIIRSbuf
-    elif settings.FIRE_SENSOR == "mcd64":
-        buf = settings.MCD64buf
+    buf = hull_buffer()
+
+    # drop pixels before the hull calculation
+    all_locs = locs
+    n_pruned = 0
+    if prune:
+        locs, n_pruned = prune_hull_pixels(locs)
+        hull_prune_stats["pixels"] += len(all_locs)
+        hull_prune_stats["pruned"] += n_pruned
 
     # number of pixels
     nfp = len(locs)
@@ -132,6 +183,10 @@ def cal_hull(locs):
     if nfp > 3:
         hull = doConcH(locs, alpha=settings.valpha)
 
+    # pruning should never switch to the convex or point hull, redo without it
+    if n_pruned > 0 and (hull is None or hull.area == 0):
+        return cal_hull(all_locs, prune=False)
+
     # if you don't have a good hull yet and there are more
     # than 2 points: try using convex hull
     if nfp > 2 and (hull is None or hull.area == 0):
@@ -146,6 +201,58 @@ def cal_hull(locs):
     return hull
 
 
+def cal_hulls(pixels, by="initial_cid"):
+    """calculate the hulls of all pixel clusters (e.g. of a time step) at once.
+        clusters of one or two pixels are buffered in a single vectorized call,
+        larger clusters use `cal_hull` (on a process pool if
+        `settings.hull_workers` > 1)
+    Parameters
+    ----------
+    pixels : df
+        dataframe containing x and y of all pixels and the cluster id column
+    by : str
+        name of the cluster id column
+    Returns
+    -------
+    hulls : gpd.GeoSeries
+        hull of each cluster, indexed by the sorted cluster ids
+    """
+    codes, cids = pd.factorize(pixels[by], sort=True)
+    hulls = np.empty(len(cids), dtype=object)
+    if len(cids) == 0:
+        return gpd.GeoSeries(hulls, index=cids, crs=f"epsg:{settings.EPSG_CODE}")
+
+    # sort pixels by cluster (keeping the pixel order within each cluster)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    locs = pixels[["x", "y"]].values[order]
+    counts = np.bincount(codes, minlength=len(cids))
+    starts = np.cumsum(counts) - counts
+
+    # one or two pixels: buffered MultiPoints
+    small = counts <= 2
+    if small.any():
+        in_small = small[codes]
+        small_codes = np.cumsum(small)[codes[in_small]] - 1
+        mps = shapely.multipoints(locs[in_small], indices=small_codes)
+        # (same resolution as the geometry.buffer method used by cal_hull)
+        hulls[small] = shapely.buffer(mps, hull_buffer(), quad_segs=16)
+
+    # larger clusters: concave/convex hulls
+    large = np.flatnonzero(~small)
+    large_locs = [locs[starts[i] : starts[i] + counts[i]] for i in large]
+    if settings.hull_workers > 1 and len(large) > 1:
+        with ProcessPoolExecutor(max_workers=settings.hull_workers) as executor:
+            chunksize = max(1, len(large) // (4 * settings.hull_workers))
+            large_hulls = list(executor.map(cal_hull, large_locs, chunksize=chunksize))
+    else:
+        large_hulls = [cal_hull(l) for l in large_locs]
+    for i, hull in zip(large, large_hulls):
+        hulls[i] = hull
+
+    return gpd.GeoSeries(hulls, index=cids, crs=f"epsg:{settings.EPSG_CODE}")
+
+
 def get_ext_pixels(pixels, hull):
     """calculate the exterior pixels around a hull
     Parameters
@@ -1,6 +1,7 @@
 import os
 
 import datetime
+import json
 from typing import Literal
 
 import fsspec
@@ -18,7 +19,7 @@ warnings.filterwarnings("ignore", "Sending large graph", UserWarning)
 
 from fireatlas.utils import timed
 from fireatlas.FireTypes import Region, TimeStep, Location
-from fireatlas.FireTime import t2dt, t_generator
+from fireatlas.FireTime import t2dt, t2hd, dt2t, dt2hd, t_generator
 from fireatlas.FireGpkg_sfs import getdd as singlefire_getdd
 from fireatlas.FireGpkg import getdd as snapshot_getdd
 from fireatlas import settings
@@ -28,21 +29,65 @@ def all_dir(tst: TimeStep, region: Region, location: Location = None):
     return os.path.join(settings.get_path(location), settings.OUTPUT_DIR, region[0], str(tst[0]))
 
 
+def manifest_filepath(tst: TimeStep, region: Region, location: Location = None):
+    """manifest file listing the time steps with a complete allfires and
+    allpixels save"""
+    return os.path.join(all_dir(tst, region, location), "manifest.json")
+
+
+def read_saved_ts(tst: TimeStep, region: Region, location: Location = None):
+    """Time steps listed in the manifest, in time order (None if there is
+    no manifest)"""
+    fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
+    filepath = manifest_filepath(tst, region, location=location)
+    if not fs.exists(filepath):
+        return None
+    with fs.open(filepath, "r") as f:
+        saved_ts = json.load(f)["saved"]
+    return sorted((list(t) for t in saved_ts), key=t2hd)
+
+
+def save_manifest(saved_ts, tst: TimeStep, region: Region):
+    """Write the manifest listing saved_ts, the time steps with a complete
+    allfires and allpixels save. Write it once both are saved, so that a
+    partial save is never used to restart from.
+
+    Returns
+    -------
+    output_filepath : str
+        the manifest file
+    """
+    output_filepath = manifest_filepath(tst, region, location="local")
+    os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+    saved_ts = sorted({t2hd(t): list(t) for t in saved_ts}.items())
+    # write and rename, so that the manifest is never read half written
+    with open(output_filepath + ".tmp", "w") as f:
+        json.dump({"saved": [t for _, t in saved_ts]}, f)
+    os.replace(output_filepath + ".tmp", output_filepath)
+    return output_filepath
+
+
 def get_t_of_last_allfires_run(tst: TimeStep, ted: TimeStep, region: Region, location: Location = None):
-    """Look at the files in a given location and figure out the t of the last
-    allfires run. 
-    
+    """Look at the manifest in a given location and figure out the t of the
+    last allfires run. Without a manifest (saves from before it was added),
+    look for the allfires and allpixels files saved whole at each t.
+
     Returns
     -------
     t: TimeStep
-       latest t within range for which there are allfires and allpixels files
+       latest t within range for which there are allfires and allpixels saves
     """
+    saved_ts = read_saved_ts(tst, region, location=location)
+    if saved_ts is not None:
+        saved_ts = [t for t in saved_ts if t2hd(tst) <= t2hd(t) <= t2hd(ted)]
+        return saved_ts[-1] if saved_ts else None
+
     fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
     all_filenames = {
         os.path.basename(f).split(".")[0]
         for f in [
-            *fs.glob(os.path.join(all_dir(tst, region, location=location), "allpixels*")),
-            *fs.glob(os.path.join(all_dir(tst, region, location=location), "allfires*")),
+            *fs.glob(os.path.join(all_dir(tst, region, location=location), "allpixels_*")),
+            *fs.glob(os.path.join(all_dir(tst, region, location=location), "allfires_*")),
         ]
     }
 
@@ -52,40 +97,181 @@ def get_t_of_last_allfires_run(tst: TimeStep, ted: TimeStep, region: Region, loc
             return t
 
 
+# columns of allpixels changed by fire tracking after a pixel's time step
+PIXEL_STATE_COLUMNS = ["fid", "in_fline", "ext_until"]
+
+
 def allpixels_filepath(
     tst: TimeStep,
     ted: TimeStep,
     region: Region,
     location: Location = None,
 ):
-    filename = f"allpixels_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.csv"
+    """allpixels delta file at ted: the state columns of the pixels that
+    changed after their time step was saved"""
+    filename = f"allpixels_delta_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.parq"
     return os.path.join(all_dir(tst, region, location), filename)
 
 
+def allpixels_partition_filepath(
+    tst: TimeStep,
+    t: TimeStep,
+    region: Region,
+    location: Location = None,
+):
+    """allpixels partition file holding the pixels of time step t"""
+    filename = f"t_{t[0]}{t[1]:02}{t[2]:02}_{t[3]}.parq"
+    return os.path.join(all_dir(tst, region, location), "allpixels_parts", filename)
+
+
+def _partitions_between(fs, partition_filepath, tst, ted, region, location):
+    """Partition files (see partition_filepath) of the time steps from tst
+    to ted, in time order"""
+    # partitions named by time step sort in time order
+    partition_dir = os.path.dirname(partition_filepath(tst, ted, region, location))
+    first = os.path.basename(partition_filepath(tst, tst, region))
+    last = os.path.basename(partition_filepath(tst, ted, region))
+    return sorted(
+        f for f in fs.glob(os.path.join(partition_dir, "t_*.parq"))
+        if first <= os.path.basename(f) <= last
+    )
+
+
 @timed
-def save_allpixels(allpixels, tst: TimeStep, ted: TimeStep, region: Region):
+def save_allpixels(
+    allpixels,
+    tst: TimeStep,
+    ted: TimeStep,
+    region: Region,
+    base=None,
+):
+    """Save allpixels at ted
+
+    The pixels not in base (the state columns of the pixels already saved in
+    partition files, see read_allpixels) are written as one partition file
+    per time step. For the pixels in base, the state columns that differ
+    from base are written to the delta file of ted.
+
+    Returns
+    -------
+    output_filepath : str
+        the delta file of ted
+    """
     output_filepath = allpixels_filepath(tst, ted, region, location="local")
 
     # make path if necessary
     os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
 
-    allpixels[allpixels.t <= t2dt(ted)].to_csv(output_filepath)
+    allpixels = allpixels[allpixels.t <= t2dt(ted)]
+    if base is None:
+        base = allpixels[PIXEL_STATE_COLUMNS].iloc[:0]
+    is_new = ~allpixels.index.isin(base.index)
+    if len(allpixels) == 0:
+        # no partitions, the delta file keeps the columns
+        _typed_allpixels(allpixels).to_parquet(output_filepath)
+        return output_filepath
+
+    newpixels = allpixels[is_new]
+    for dt, df in newpixels.groupby("t", sort=False):
+        filepath = allpixels_partition_filepath(tst, dt2t(dt), region, location="local")
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        _typed_allpixels(df).to_parquet(filepath)
+
+    state = allpixels.loc[~is_new, PIXEL_STATE_COLUMNS]
+    base = base.reindex(state.index)
+    changed = ~((state == base) | (state.isna() & base.isna())).all(axis=1)
+    _typed_allpixels(state[changed]).to_parquet(output_filepath)
     return output_filepath
 
 
+def saved_allpixels_base(allpixels, ted: TimeStep, base=None):
+    """State columns of allpixels as saved in the partition files once
+    save_allpixels(allpixels, ..., ted, base=base) has run: base for the
+    pixels in base, the values at ted for the pixels written to partitions.
+    Pass it as base to the next save of the same run."""
+    allpixels = allpixels[allpixels.t <= t2dt(ted)]
+    if base is not None:
+        allpixels = allpixels[~allpixels.index.isin(base.index)]
+    new = _typed_allpixels(allpixels[PIXEL_STATE_COLUMNS])
+    return new if base is None else pd.concat([base, new])
+
+
+def _with_pixel_ids(df):
+    """allpixels saved with uuid4 strings, indexed by pixel ids instead
+    (see preprocess.pixel_ids)"""
+    from fireatlas.preprocess import pixel_ids
+
+    ids = pixel_ids(dt2hd(df["t"].values), df["Sat"].values)
+    return df.set_axis(pd.Index(ids, name="pixel_id"))
+
+
+def _typed_allpixels(df):
+    """allpixels columns with the dtypes they are stored with"""
+    if "ext_until" in df:
+        df = df.assign(ext_until=pd.to_datetime(df["ext_until"]))
+    return df
+
+
 @timed
 def read_allpixels(
     tst: TimeStep,
     ted: TimeStep,
     region: Region,
     location: Location = None,
+    columns=None,
+    with_base: bool = False,
 ):
+    """Read allpixels at ted: the partitions of the time steps up to ted,
+    with the state columns updated from the delta file of ted
+
+    Parameters
+    ----------
+    columns : list
+        columns to read (all by default)
+    with_base : bool
+        also return the state columns as saved in the partitions (the base
+        to pass to save_allpixels)
+    """
     filepath = allpixels_filepath(tst, ted, region, location=location)
-    df = pd.read_csv(filepath, index_col="uuid")
-    for col in ["t", "datetime", "ext_until"]:
-        df[col] = pd.to_datetime(df[col], format='ISO8601')
+    fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
+    # allpixels saved whole at ted, before partitions
+    legacy_filepath = os.path.join(
+        os.path.dirname(filepath),
+        f"allpixels_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.csv",
+    )
+    if not fs.exists(filepath) and fs.exists(legacy_filepath):
+        df = pd.read_csv(legacy_filepath, index_col="uuid")
+        for col in ["t", "datetime", "ext_until"]:
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+        df = _with_pixel_ids(df)
+        if columns is not None:
+            df = df[columns]
+        # nothing saved in partitions yet
+        return (df, None) if with_base else df
+
+    partitions = _partitions_between(fs, allpixels_partition_filepath, tst, ted, region, location)
+    if len(partitions) == 0:
+        df = pd.read_parquet(filepath, columns=columns)
+        return (df, None) if with_base else df
+    df = pd.concat(
+        [pd.read_parquet(fs.unstrip_protocol(f), columns=columns) for f in partitions]
+    )
+
+    state_columns = [c for c in PIXEL_STATE_COLUMNS if c in df]
+    base = df[state_columns].copy() if with_base else None
+    if state_columns:
+        delta = pd.read_parquet(filepath, columns=state_columns)
+        pos = df.index.get_indexer(delta.index)
+        delta = delta[pos >= 0]
+        pos = pos[pos >= 0]
+        for col in state_columns:
+            df.iloc[pos, df.columns.get_loc(col)] = delta[col].values
+
+    return (df, base) if with_base else df
+
+# columns of the allfires gdf changed by fire tracking after a row's time step
+FIRE_STATE_COLUMNS = ["mergeid"]
 
-    return df
 
 def allfires_filepath(
     tst: TimeStep,
@@ -93,31 +279,123 @@ def allfires_filepath(
     region: Region,
     location: Location = None,
 ):
-    filename = f"allfires_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.parq"
+    """allfires delta file at ted: the state columns of the gdf rows that
+    changed after their time step was saved"""
+    filename = f"allfires_delta_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.parq"
     return os.path.join(all_dir(tst, region, location), filename)
 
 
+def allfires_partition_filepath(
+    tst: TimeStep,
+    t: TimeStep,
+    region: Region,
+    location: Location = None,
+):
+    """allfires partition file holding the gdf rows of time step t"""
+    filename = f"t_{t[0]}{t[1]:02}{t[2]:02}_{t[3]}.parq"
+    return os.path.join(all_dir(tst, region, location), "allfires_parts", filename)
+
+
 @timed
-def save_allfires_gdf(allfires_gdf, tst: TimeStep, ted: TimeStep, region: Region):
+def save_allfires_gdf(
+    allfires_gdf,
+    tst: TimeStep,
+    ted: TimeStep,
+    region: Region,
+    base=None,
+):
+    """Save the allfires gdf at ted
+
+    As for allpixels (see save_allpixels), the rows not in base are written
+    as one GeoParquet partition file per time step, and the state columns
+    that differ from base to the delta file of ted.
+
+    Returns
+    -------
+    output_filepath : str
+        the delta file of ted
+    """
     output_filepath = allfires_filepath(tst, ted, region, location="local")
 
     # make path if necessary
     os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
 
-    allfires_gdf.to_parquet(output_filepath)
+    if len(allfires_gdf) == 0:
+        # no partitions, the delta file keeps the columns
+        allfires_gdf.to_parquet(output_filepath)
+        return output_filepath
+
+    if base is None:
+        base = allfires_gdf[FIRE_STATE_COLUMNS].iloc[:0]
+    is_new = ~allfires_gdf.index.isin(base.index)
+
+    for dt, gdf in allfires_gdf[is_new].groupby(level="t", sort=False):
+        filepath = allfires_partition_filepath(tst, dt2t(dt), region, location="local")
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        gdf.to_parquet(filepath)
+
+    state = pd.DataFrame(allfires_gdf.loc[~is_new, FIRE_STATE_COLUMNS])
+    base = base.reindex(state.index)
+    changed = (state != base).any(axis=1)
+    state[changed].to_parquet(output_filepath)
     return output_filepath
 
 
+def saved_allfires_base(allfires_gdf, base=None):
+    """State columns of the allfires gdf as saved in the partition files
+    once save_allfires_gdf(allfires_gdf, ..., base=base) has run (see
+    saved_allpixels_base)"""
+    if base is not None:
+        allfires_gdf = allfires_gdf[~allfires_gdf.index.isin(base.index)]
+    new = pd.DataFrame(allfires_gdf[FIRE_STATE_COLUMNS])
+    return new if base is None else pd.concat([base, new])
+
+
 @timed
 def read_allfires_gdf(
     tst: TimeStep,
     ted: TimeStep,
     region: Region,
     location: Location = None,
+    with_base: bool = False,
 ):
+    """Read the allfires gdf at ted: the partitions of the time steps up to
+    ted, with the state columns updated from the delta file of ted
+
+    Parameters
+    ----------
+    with_base : bool
+        also return the state columns as saved in the partitions (the base
+        to pass to save_allfires_gdf)
+    """
     filepath = allfires_filepath(tst, ted, region, location=location)
+    fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
+
+    # allfires gdf saved whole at ted, before partitions
+    legacy_filepath = os.path.join(
+        os.path.dirname(filepath),
+        f"allfires_{ted[0]}{ted[1]:02}{ted[2]:02}_{ted[3]}.parq",
+    )
+    if not fs.exists(filepath) and fs.exists(legacy_filepath):
+        gdf = gpd.read_parquet(legacy_filepath)
+        return (gdf, None) if with_base else gdf
+
+    partitions = _partitions_between(fs, allfires_partition_filepath, tst, ted, region, location)
+    if len(partitions) == 0:
+        # nothing saved in partitions: the delta file holds the empty gdf
+        gdf = gpd.read_parquet(filepath)
+        return (gdf, None) if with_base else gdf
+    gdf = pd.concat([gpd.read_parquet(fs.unstrip_protocol(f)) for f in partitions])
+
+    base = gdf[FIRE_STATE_COLUMNS].copy() if with_base else None
+    delta = pd.read_parquet(filepath, columns=FIRE_STATE_COLUMNS)
+    pos = gdf.index.get_indexer(delta.index)
+    delta = delta[pos >= 0]
+    pos = pos[pos >= 0]
+    for col in FIRE_STATE_COLUMNS:
+        gdf.iloc[pos, gdf.columns.get_loc(col)] = delta[col].values
 
-    return gpd.read_parquet(filepath)
+    return (gdf, base) if with_base else gdf
 
 
 def snapshot_folder(
@@ -259,6 +537,7 @@ def save_fire_nplist(allpixels_fid, region, fid, tst):
         ["x", "y", "FRP", "DS", "DT", "ampm", "datetime", "Sat"]
     ].copy()
     data.columns = ["x", "y", "frp", "DS", "DT", "ampm", "datetime", "sat"]
+    data = data.astype({"ampm": str, "sat": str})  # may be categorical
     data["geometry"] = gpd.points_from_xy(data.x, data.y)
     data = data.set_geometry("geometry", crs=settings.EPSG_CODE)
 
@@ -1,10 +1,11 @@
 import os
-import uuid
 import fsspec
+import numpy as np
 import pandas as pd
 from typing import Literal, Optional
 from shapely import to_geojson, from_geojson
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from tqdm import tqdm
 import rasterio
@@ -14,10 +15,48 @@ from fireatlas.FireLog import logger
 from fireatlas.FireTypes import Region, TimeStep, Location
 from fireatlas.utils import timed
 from fireatlas.FireClustering import do_clustering
-from fireatlas.FireTime import t_generator, t2dt
+from fireatlas.FireTime import t_generator, t2dt, t2hd
 from fireatlas import FireIO, FireMain, settings
 
 
+# pixel ids pack the half-day index, the satellite and the number of the pixel
+# among the pixels of that time step and satellite into an int64
+PIXEL_ID_SATS = {"SNPP": 0, "NOAA20": 1}
+PIXEL_ID_SAT_BITS = 4
+PIXEL_ID_ROW_BITS = 24
+
+
+def pixel_ids(hd, sat):
+    """Deterministic int64 ids of pixels
+
+    Parameters
+    ----------
+    hd : int or array-like of int
+        half-day index of the time step of each pixel
+    sat : array-like of str
+        satellite of each pixel (see PIXEL_ID_SATS)
+
+    Returns
+    -------
+    pixel_id : np.array of int64
+        ids made of hd, the satellite and the number of the pixel among those
+        of the same hd and satellite (in the given order)
+    """
+    sat = pd.Series(np.asarray(sat))
+    sat_code = sat.map(PIXEL_ID_SATS)
+    if sat_code.isna().any():
+        raise ValueError(f"no pixel id code for satellites {set(sat[sat_code.isna()])}")
+    hd = np.broadcast_to(np.asarray(hd, dtype=np.int64), (len(sat),))
+    n = pd.DataFrame({"hd": hd, "sat": sat_code}).groupby(["hd", "sat"]).cumcount()
+    if len(n) > 0 and n.max() >= 2**PIXEL_ID_ROW_BITS:
+        raise ValueError("too many pixels in a time step for pixel ids")
+    return (
+        (hd << (PIXEL_ID_SAT_BITS + PIXEL_ID_ROW_BITS))
+        | (sat_code.values.astype(np.int64) << PIXEL_ID_ROW_BITS)
+        | n.values.astype(np.int64)
+    )
+
+
 def preprocessed_region_filename(region: Region, location: Location = None):
     return os.path.join(
         settings.get_path(location), settings.PREPROCESSED_DIR, region[0], f"{region[0]}.json"
@@ -100,25 +139,115 @@ def preprocess_landcover(filename="nlcd_export_510m_simplified", force=False):
     return output_filepath
 
 
+# file extension of preprocessed files in each format
+PREPROCESSED_EXTENSIONS = {"csv": ".txt", "parquet": ".parq"}
+
+# dtypes of the columns of preprocessed files written as Parquet
+PREPROCESSED_DTYPES = {
+    "Lat": "float32",
+    "Lon": "float32",
+    "x": "float32",
+    "y": "float32",
+    "Sat": "category",
+    "ampm": "category",
+    "input_filename": "category",
+    "datetime": "datetime64[ns]",
+}
+
+
 def preprocessed_filename(
     t: TimeStep,
     sat: Optional[Literal["NOAA20", "SNPP"]] = None,
     region: Optional[Region] = None,
     suffix="",
-    location: Location = None
+    location: Location = None,
+    fmt: Optional[Literal["csv", "parquet"]] = None,
 ):
     if sat is None:
         sat = settings.FIRE_SOURCE
+    if fmt is None:
+        fmt = settings.PREPROCESSED_FORMAT
 
     return os.path.join(
         settings.get_path(location),
         settings.PREPROCESSED_DIR,
         *([] if region is None else [region[0]]),
         sat,
-        f"{t[0]}{t[1]:02}{t[2]:02}_{t[3]}{suffix}.txt",
+        f"{t[0]}{t[1]:02}{t[2]:02}_{t[3]}{suffix}{PREPROCESSED_EXTENSIONS[fmt]}",
     )
 
 
+def find_preprocessed_file(
+    t: TimeStep,
+    sat: Optional[Literal["NOAA20", "SNPP"]] = None,
+    region: Optional[Region] = None,
+    location: Location = None,
+):
+    """The preprocessed file of t in either format (settings.PREPROCESSED_FORMAT
+    first), or None if there is none"""
+    fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
+    fmts = sorted(PREPROCESSED_EXTENSIONS, key=lambda fmt: fmt != settings.PREPROCESSED_FORMAT)
+    for fmt in fmts:
+        filepath = preprocessed_filename(t, sat=sat, region=region, location=location, fmt=fmt)
+        if fs.exists(filepath):
+            return filepath
+
+
+def write_preprocessed_file(df, filepath: str):
+    """Write preprocessed pixels in the format given by the filepath extension"""
+    if filepath.endswith(PREPROCESSED_EXTENSIONS["parquet"]):
+        dtypes = {k: tp for k, tp in PREPROCESSED_DTYPES.items() if k in df}
+        df.astype(dtypes).to_parquet(filepath, index=False)
+    else:
+        df.to_csv(filepath, index=False)
+
+
+def read_preprocessed_file(filepath: str):
+    """Read preprocessed pixels written by write_preprocessed_file"""
+    if filepath.endswith(PREPROCESSED_EXTENSIONS["parquet"]):
+        return pd.read_parquet(filepath)
+    df = pd.read_csv(filepath)
+    df["datetime"] = pd.to_datetime(df["datetime"], format='ISO8601')
+    return df
+
+
+@timed
+def convert_preprocessed_files(location: Location = None, remove: bool = False):
+    """Convert the preprocessed CSV files under PREPROCESSED_DIR to Parquet
+
+    Parameters
+    ----------
+    location : optional Literal["s3", "local"]
+        where the preprocessed files are
+    remove : bool
+        remove each CSV file once converted
+
+    Returns
+    -------
+    output_paths : list[str]
+        List of filepaths that this function has written to.
+    """
+    fs = fsspec.filesystem(location or settings.READ_LOCATION, use_listings_cache=False)
+    root = os.path.join(settings.get_path(location), settings.PREPROCESSED_DIR)
+    csv_ext, parquet_ext = PREPROCESSED_EXTENSIONS["csv"], PREPROCESSED_EXTENSIONS["parquet"]
+
+    # <sat>/<t> files and <region>/<sat>/<t> files
+    relpaths = [
+        os.path.relpath(f, fsspec.core.strip_protocol(root))
+        for pattern in [f"*/*{csv_ext}", f"*/*/*{csv_ext}"]
+        for f in fs.glob(os.path.join(root, pattern))
+    ]
+    output_paths = []
+    for relpath in tqdm(relpaths, "Converting files", file=sys.stdout):
+        filepath = os.path.join(root, relpath)
+        output_filepath = filepath[: -len(csv_ext)] + parquet_ext
+        write_preprocessed_file(read_preprocessed_file(filepath), output_filepath)
+        if remove:
+            fs.rm(filepath)
+        output_paths.append(output_filepath)
+    return output_paths
+
+
 def NRT_filepath(t: TimeStep, sat: Literal["SNPP", "NOAA20"]):
     """Filepath for NRT VIIRS data
 
@@ -200,8 +329,7 @@ def check_preprocessed_file(
 
     needs_processing = []
     for t in t_generator(tst, ted):
-        filepath = preprocessed_filename(t, sat=sat, location=location)
-        if not fs.exists(filepath):
+        if find_preprocessed_file(t, sat=sat, location=location) is None:
             needs_processing.append(t)
 
     if freq == "monthly":
@@ -211,7 +339,7 @@ def check_preprocessed_file(
 
 
 @timed
-def preprocess_input_file(filepath: str):
+def preprocess_input_file(filepath: str, max_workers: int = 8):
     """
     Preprocess monthly or daily NRT file of fire location data.
 
@@ -221,6 +349,8 @@ def preprocess_input_file(filepath: str):
     ----------
     filepath : str
         Path to input data. Can be local or s3.
+    max_workers : int
+        number of threads writing the half-day files
 
     Returns
     -------
@@ -261,28 +391,39 @@ def preprocess_input_file(filepath: str):
         ["Lat", "Lon", "FRP", "Sat", "DT", "DS", "input_filename", "datetime", "ampm"]
     ]
 
-    output_paths = []
-
-    # groupby days and if there are more than 1 days, include a progress bar
-    gb = df.groupby(df["datetime"].dt.date)
-    if gb.ngroups > 1:
-        gb = tqdm(gb, "Processing days", file=sys.stdout)
-
-    for day, data in gb:
-        for ampm in ["AM", "PM"]:
-            time_filtered_df = data.loc[df["ampm"] == ampm]
-
-            output_filepath = preprocessed_filename(
-                (day.year, day.month, day.day, ampm), sat=sat, location="local"
-            )
+    # sort once by (day, ampm) so that the pixels of each file are a
+    # contiguous slice; the stable sort keeps the input order within a file
+    days = df["datetime"].values.astype("datetime64[D]")
+    key = days.astype(np.int64) * 2 + (df["ampm"] == "PM").values
+    order = np.argsort(key, kind="stable")
+    df, key = df.iloc[order], key[order]
+
+    slices = []
+    for day in np.unique(days):
+        for i, ampm in enumerate(["AM", "PM"]):
+            k = day.astype(np.int64) * 2 + i
+            start, stop = np.searchsorted(key, [k, k + 1])
+            slices.append((day.astype(object), ampm, slice(start, stop)))
+
+    def write(day, ampm, sl):
+        output_filepath = preprocessed_filename(
+            (day.year, day.month, day.day, ampm), sat=sat, location="local"
+        )
 
-            # make nested path if necessary
-            os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+        # make nested path if necessary
+        os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
 
-            # save active pixels at this time step (day and ampm filter)
-            time_filtered_df.to_csv(output_filepath, index=False)
+        # save active pixels at this time step (day and ampm filter)
+        write_preprocessed_file(df.iloc[sl], output_filepath)
+        return output_filepath
 
-            output_paths.append(output_filepath)
+    # write the files on a thread pool and if there are more than 1 days,
+    # include a progress bar
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        output_paths = pool.map(lambda args: write(*args), slices)
+        if len(slices) > 2:
+            output_paths = tqdm(output_paths, "Processing days", total=len(slices), file=sys.stdout)
+        output_paths = list(output_paths)
 
     return output_paths
 
@@ -303,8 +444,10 @@ def read_preprocessed_input(
     sat: Literal["NOAA20", "SNPP"],
     location: Location = None,
 ):
-    filename = preprocessed_filename(t, sat=sat, location=location)
-    df = pd.read_csv(filename)
+    filename = find_preprocessed_file(t, sat=sat, location=location)
+    if filename is None:
+        raise FileNotFoundError(preprocessed_filename(t, sat=sat, location=location))
+    df = read_preprocessed_file(filename)
     return df
 
 
@@ -314,9 +457,15 @@ def read_preprocessed(
     region: Region,
     location: Location = None,
 ):
-    filename = preprocessed_filename(t, region=region, location=location)
-    df = pd.read_csv(filename).set_index("uuid").assign(t=t2dt(t))
-    df["datetime"] = pd.to_datetime(df["datetime"], format='ISO8601')
+    filename = find_preprocessed_file(t, region=region, location=location)
+    if filename is None:
+        raise FileNotFoundError(preprocessed_filename(t, region=region, location=location))
+    df = read_preprocessed_file(filename)
+    if "uuid" in df.columns:
+        # preprocessed before pixel ids: number the pixels the same way
+        df = df.drop(columns="uuid")
+        df.insert(0, "pixel_id", pixel_ids(t2hd(t), df["Sat"]))
+    df = df.set_index("pixel_id").assign(t=t2dt(t))
     return df
 
 
@@ -384,16 +533,16 @@ def preprocess_region_t(
         # do preliminary clustering using new active fire locations (assign cid to each pixel)
         df = do_clustering(df, settings.CONNECTIVITY_CLUSTER_KM)
 
-        # assign a uuid to each pixel and put it as the first column
-        df.insert(0, "uuid", [uuid.uuid4() for _ in range(len(df.index))])
+        # assign a pixel id to each pixel and put it as the first column
+        df.insert(0, "pixel_id", pixel_ids(t2hd(t), df["Sat"]))
     else:
         # make a dummy DataFrame with the right columns so that we know later that
         # we don't need to do this step again.
-        df = pd.DataFrame(columns=["uuid", *columns, "initial_cid"])
+        df = pd.DataFrame(columns=["pixel_id", *columns, "initial_cid"])
 
     # make nested path if necessary
     os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
 
-    df.to_csv(output_filepath, index=False)
+    write_preprocessed_file(df, output_filepath)
 
     return output_filepath
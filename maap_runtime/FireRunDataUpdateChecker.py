@@ -21,7 +21,10 @@ def Run():
     # uploads raw satellite files from `job_nrt_current_day_updates` in parallel
     data_upload_futures = client.map(
         partial(copy_from_local_to_s3, fs=fs),
-        glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.txt")
+        [
+            *glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.txt"),
+            *glob.glob(f"{settings.LOCAL_PATH}/{settings.PREPROCESSED_DIR}/*/*.parq"),
+        ]
     )
     # block until half-day timesteps and region are on s3
     timed(client.gather, text=f"Dask upload of {len(data_upload_futures) + 1} files")([*data_upload_futures])
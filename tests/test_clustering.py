@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import pytest
+from sklearn.neighbors import BallTree
 from fireatlas import FireClustering
 
 
@@ -26,6 +27,21 @@ def test_compute_all_spatial_distances(data, max_thresh_km, expected):
     assert np.array_equal(result, expected)
 
 
+@pytest.mark.parametrize("seed, num_points", [(0, 1), (1, 100), (2, 3000)])
+def test_compute_neighbor_graph_matches_balltree(seed, num_points):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(-20000, 20000, size=(num_points, 2))
+    data = pd.DataFrame({"x": xy[:, 0], "y": xy[:, 1]})
+
+    indptr, indices = FireClustering.compute_neighbor_graph(data, 0.7)
+
+    expected = BallTree(xy).query_radius(xy, r=700)
+    assert len(indptr) == num_points + 1
+    for i in range(num_points):
+        row = indices[indptr[i] : indptr[i + 1]]
+        assert np.array_equal(np.sort(row), np.sort(expected[i][expected[i] != i]))
+
+
 @pytest.mark.parametrize(
     "data, max_thresh_km, should_cluster",
     [
@@ -110,3 +126,90 @@ def test_do_clustering(data, max_thresh_km, should_cluster):
         # each pixel is a cluster
         cluster_series = clustered_df.groupby("initial_cid").size()
         assert cluster_series.count() == 3
+
+
+def _do_clustering_reference(data, max_thresh_km):
+    """the original list-based cluster growing, kept to check parity"""
+    num_points = len(data)
+    point_to_cluster_id = np.full(num_points, fill_value=-1, dtype=np.int64)
+    neighbor_inds = FireClustering.compute_all_spatial_distances(data, max_thresh_km)
+
+    cluster_id_counter = 0
+    to_check = np.full(num_points, fill_value=1, dtype=np.int8)
+    while np.sum(to_check) > 0:
+        start_ind = np.argmax(to_check == 1)
+        neighbors_to_search = list(neighbor_inds[start_ind])
+        all_neighbors = neighbors_to_search
+        if len(all_neighbors) == 0:
+            point_to_cluster_id[start_ind] = cluster_id_counter
+            cluster_id_counter += 1
+            to_check[start_ind] = 0
+        else:
+            searched_neighbours = [start_ind]
+            while len(neighbors_to_search) > 0:
+                px = neighbors_to_search[0]
+                searched_neighbours.append(px)
+                all_neighbors = list(set(all_neighbors + list(neighbor_inds[px])))
+                neighbors_to_search = list(
+                    set(all_neighbors).difference(searched_neighbours)
+                )
+            point_to_cluster_id[all_neighbors] = cluster_id_counter
+            cluster_id_counter += 1
+            to_check[all_neighbors] = 0
+    return point_to_cluster_id
+
+
+@pytest.mark.parametrize("seed, num_points", [(0, 3), (1, 50), (2, 500), (3, 2000)])
+def test_do_clustering_matches_reference(seed, num_points):
+    rng = np.random.default_rng(seed)
+    # a handful of blobs of pixels plus some scattered ones
+    centers = rng.uniform(0, 50000, size=(8, 2))
+    xy = centers[rng.integers(0, 8, num_points)] + rng.normal(0, 1500, (num_points, 2))
+    data = pd.DataFrame({"x": xy[:, 0], "y": xy[:, 1]})
+
+    clustered_df = FireClustering.do_clustering(data, 0.7)
+
+    expected = _do_clustering_reference(data, 0.7)
+    assert np.array_equal(clustered_df["initial_cid"].values, expected)
+
+
+def test_cal_distance():
+    # one degree of latitude along a meridian
+    dist = FireClustering.cal_distance([0, 0], [1, 0])
+    assert isinstance(dist, float)
+    assert dist == pytest.approx(111.19, abs=0.01)
+
+    locs1 = np.array([[0, 0], [37.1, -119.3], [60.5, 150.2]])
+    locs2 = np.array([[1, 0], [37.2, -119.1], [60.4, 150.0]])
+    dists = FireClustering.cal_distance_arr(locs1, locs2)
+    expected = [FireClustering.cal_distance(l1, l2) for l1, l2 in zip(locs1, locs2)]
+    assert np.allclose(dists, expected)
+
+
+@pytest.mark.parametrize("n1, n2", [(1, 1), (5, 30), (200, 300)])
+def test_cal_mindist(n1, n2):
+    rng = np.random.default_rng(n1 + n2)
+    c1 = np.column_stack([rng.uniform(37, 37.5, n1), rng.uniform(-119.5, -119, n1)])
+    c2 = np.column_stack([rng.uniform(37.4, 38, n2), rng.uniform(-119.2, -118.7, n2)])
+
+    expected = min(FireClustering.cal_distance(l1, l2) for l1 in c1 for l2 in c2)
+
+    assert FireClustering.cal_mindist(c1, c2) == pytest.approx(expected)
+    assert FireClustering.cal_mindist_tree(c1, c2) == pytest.approx(expected)
+    # with a threshold the search can stop early, but never above it
+    assert FireClustering.cal_mindist_tree(c1, c2, thresh_km=1e4, chunk_size=1) <= 1e4
+
+
+def test_intersecting_pairs():
+    from shapely.geometry import Point, box
+
+    tree_geoms = [box(0, 0, 1, 1), box(2, 2, 3, 3), box(0, 0, 3, 3)]
+    geoms = [Point(0.5, 0.5), None, Point(2.5, 2.5), Point(10, 10), box(1.5, 0, 1.8, 0.1)]
+
+    igeoms, itree = FireClustering.intersecting_pairs(geoms, tree_geoms)
+
+    assert list(zip(igeoms, itree)) == [(0, 0), (0, 2), (2, 1), (2, 2), (4, 2)]
+
+    # no geometries at all
+    igeoms, itree = FireClustering.intersecting_pairs(geoms, [])
+    assert len(igeoms) == len(itree) == 0
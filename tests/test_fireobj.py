@@ -0,0 +1,339 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fireatlas.FireObj import Allfires, Fire, group_pixel_rows
+from fireatlas.FireTime import t2dt, t_generator
+
+
+TS = list(t_generator([2020, 9, 5, "AM"], [2020, 9, 7, "PM"]))
+
+
+def _allpixels(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    allpixels = pd.DataFrame(
+        {
+            "x": rng.uniform(0, 1e4, n),
+            "y": rng.uniform(0, 1e4, n),
+            # shuffled so row order differs from time order
+            "t": [t2dt(TS[i]) for i in rng.integers(0, len(TS), n)],
+        },
+        index=[f"p{i}" for i in range(n)],
+    )
+    allpixels["fid"] = -1
+    allpixels["in_fline"] = None
+    allpixels["ext_until"] = None
+    return allpixels
+
+
+def _scan(allpixels, fid, op, t):
+    """full-table boolean scan used before the per-fire index"""
+    return allpixels[(allpixels["fid"] == fid) & op(allpixels["t"], t2dt(t))]
+
+
+def test_fire_pixels_match_full_scan():
+    allpixels = _allpixels()
+    f0 = Fire(0, TS[-1], allpixels)
+    f1 = Fire(1, TS[-1], allpixels)
+    f0.pixels = allpixels.iloc[:200]
+    f1.pixels = allpixels.iloc[150:]  # takes over rows 150-199 from f0
+    f0.t_st = TS[0]
+
+    for f in (f0, f1):
+        for t in TS:
+            f.t = t
+            pd.testing.assert_frame_equal(
+                f.pixels, _scan(allpixels, f.fireID, pd.Series.le, t)
+            )
+            pd.testing.assert_frame_equal(
+                f.newpixels, _scan(allpixels, f.fireID, pd.Series.eq, t)
+            )
+    pd.testing.assert_frame_equal(
+        f0.ignpixels, _scan(allpixels, 0, pd.Series.eq, TS[0])
+    )
+    assert f0.n_pixels == 150
+
+
+def test_fire_extpixels():
+    allpixels = _allpixels()
+    f = Fire(0, TS[2], allpixels)
+    f.pixels = allpixels.iloc[:100]
+    f.t_ed = TS[2]
+    f.extpixels = f.newpixels.iloc[:5]
+
+    f.t = TS[3]
+    ext = f.extpixels
+    expected = allpixels[
+        (allpixels["fid"] == 0)
+        & (
+            (allpixels["ext_until"] >= t2dt(TS[2]))
+            | (allpixels["t"] == t2dt(TS[3]))
+        )
+    ]
+    pd.testing.assert_frame_equal(ext, expected)
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_group_pixel_rows(lazy):
+    allpixels = _allpixels()
+    allpixels["fid"] = np.arange(len(allpixels)) % 7
+    rows_by_fid = group_pixel_rows(allpixels)
+    assert sorted(rows_by_fid) == list(range(7))
+
+    for fid, rows in rows_by_fid.items():
+        f = Fire(fid, TS[-1], allpixels)
+        # without rows (a fire rebuilt from saved state), a full scan
+        f._rows = None if lazy else rows
+        assert np.array_equal(f._pixel_rows(), rows)
+        assert np.all(np.diff(allpixels["t"].values[rows]) >= np.timedelta64(0))
+        pd.testing.assert_frame_equal(
+            f.pixels, _scan(allpixels, fid, pd.Series.le, TS[-1])
+        )
+
+
+def test_fire_pixels_setter():
+    allpixels = _allpixels()
+    f = Fire(0, TS[-1], allpixels)
+    assert len(f._pixel_rows()) == 0  # a new fire has no pixels, no scan
+
+    f.pixels = allpixels.iloc[[3, 1]]
+    assert sorted(f._rows) == [1, 3]
+    assert list(allpixels.fid.iloc[:4]) == [-1, 0, -1, 0]
+
+    with pytest.raises(ValueError):
+        f.pixels = pd.concat([allpixels.iloc[[5]], allpixels.iloc[[6]].rename(index=lambda i: "missing")])
+    assert allpixels.fid.iloc[-1] != 0
+
+
+def test_fire_property_cache():
+    from shapely.geometry import box
+    from fireatlas.FireObj import property_cache_stats
+
+    allpixels = _allpixels()
+    allpixels["FRP"] = 1.0
+    f = Fire(0, TS[-1], allpixels)
+    f.pixels = allpixels.iloc[:100]
+    f.hull = box(0, 0, 1e4, 1e4)
+
+    property_cache_stats.clear()
+    assert f.n_pixels == 100
+    assert f.farea == 100
+    assert f.pixden == 1
+    assert (property_cache_stats["hits"], property_cache_stats["misses"]) == (2, 3)
+
+    # new hull
+    f.hull = box(0, 0, 2e4, 1e4)
+    assert f.farea == 200
+    # pixels added
+    f.pixels = allpixels.iloc[100:150]
+    assert f.n_pixels == 150
+    # pixels taken over by another fire
+    Fire(1, TS[-1], allpixels).pixels = allpixels.iloc[:10]
+    assert f.n_pixels == 150  # cached until the fire is told
+    f.pixels_taken()
+    assert f.n_pixels == 140
+    # new t
+    f.t = TS[0]
+    assert f.n_pixels == (allpixels.iloc[10:150]["t"] == t2dt(TS[0])).sum()
+    assert f.n_newpixels == f.n_pixels
+
+
+def test_allfires_status_table():
+    import pickle
+
+    ts = list(t_generator([2020, 8, 1, "AM"], [2020, 9, 7, "PM"]))
+    allfires = Allfires(ts[-1])
+    allpixels = _allpixels()
+    for fid, t in enumerate(ts[::3]):
+        f = Fire(fid, t, allpixels)
+        f.t_st = t
+        f.invalid = fid % 5 == 0
+        allfires.fires[fid] = f
+    del allfires.fires[1]
+    allfires.fires[2] = Fire(2, ts[-1], allpixels)
+    allfires.update_t_allfires(ts[-1])
+
+    def expected(cond):
+        return [i for i, f in allfires.fires.items() if cond(f)]
+
+    assert allfires.fids_active == expected(lambda f: f.isactive)
+    assert allfires.fids_sleeper == expected(lambda f: f.mayreactivate)
+    assert allfires.fids_dead == expected(
+        lambda f: not (f.isactive or f.mayreactivate)
+    )
+    assert allfires.fids_valid == expected(lambda f: f.invalid is False)
+    assert list(allfires.burningfires) == expected(lambda f: f.isburning)
+    assert 0 < len(allfires.fids_sleeper) < len(allfires.fids_dead)
+    assert all(f.t == ts[-1] for f in allfires.fires.values())
+
+    loaded = pickle.loads(pickle.dumps(allfires))
+    assert loaded.fids_active == allfires.fids_active
+    assert loaded.fids_sleeper == allfires.fids_sleeper
+    assert loaded.fires[3].t_st == allfires.fires[3].t_st
+
+
+def test_allfires_update_gdf():
+    from shapely.geometry import box
+
+    allpixels = _allpixels()
+    allpixels["FRP"] = 1.0
+    allpixels["fid"] = np.arange(len(allpixels)) % 2
+    allfires = Allfires(TS[0])
+    for fid in (0, 1):
+        f = Fire(fid, TS[0], allpixels)
+        f.t_st = TS[0]
+        f.hull = box(0, 0, 1e4, 1e4 * (fid + 1))
+        f.fline = None
+        f.ftype = 1
+        allfires.fires[fid] = f
+
+    for t in TS[:3]:
+        allfires.cleanup(t)
+        for f in allfires.fires.values():
+            f.t_ed = t
+        if t == TS[1]:
+            allfires.heritages.append((1, 0))
+        allfires.update_gdf()
+
+    gdf = allfires.gdf
+    assert len(gdf) == 6
+    assert gdf.index.names == ["fireID", "t"]
+    assert gdf["mergeid"].tolist() == [0, 0, 0, 0, 0, 0]
+    assert gdf["farea"].dtype == float and gdf["n_pixels"].dtype == int
+    assert gdf.loc[(1, t2dt(TS[2])), "farea"] == 200
+    assert list(gdf["t_ed"]) == [t2dt(t) for t in TS[:3] for _ in (0, 1)]
+
+    with pytest.raises(ValueError):
+        allfires.update_gdf()
+
+
+def test_lazy_fire_from_gdf():
+    from shapely.geometry import box
+    from fireatlas.FireObj import FireDict, fire_from_gdf, fire_values_from_gdf
+
+    rows = []
+    for fid, (ist, ied) in enumerate([(0, 2), (1, 5), (3, 3)]):
+        for i in range(ist, ied + 1):
+            rows.append(
+                {
+                    "fireID": fid,
+                    "t": t2dt(TS[i]),
+                    "t_st": t2dt(TS[ist]),
+                    "t_ed": t2dt(TS[i]),
+                    "mergeid": 0 if fid == 2 else fid,
+                    "invalid": fid == 2,
+                    "ftype": fid + 1,
+                    "hull": box(0, 0, i + 1, 1),
+                    "fline": None,
+                }
+            )
+    gdf = pd.DataFrame(rows).set_index(["fireID", "t"])
+    t_ed = gdf.t_ed.groupby(level=0).max()
+    values = fire_values_from_gdf(gdf, t_ed, TS[-1])
+    allpixels = _allpixels()
+
+    fires = FireDict()
+    for fid in t_ed.index:
+        fires.add_lazy(
+            fid,
+            values[fid],
+            lambda fid: fire_from_gdf(fid, gdf.loc[[fid]], TS[-1], allpixels, {}),
+        )
+    assert fires.table.isvalid().tolist() == [True, True, False]
+    assert 2 in fires and not isinstance(fires._fires[2], Fire)
+
+    for fid in t_ed.index:
+        f = fire_from_gdf(fid, gdf.loc[[fid]], TS[-1], allpixels, {})
+        assert f._values() == values[fid]
+        lazy = fires[fid]
+        assert isinstance(lazy, Fire) and lazy._table is fires.table
+        assert lazy._values() == values[fid]
+        assert lazy.hull.equals(f.hull)
+
+
+def test_allfires_evict_deadfires():
+    from shapely.geometry import box
+
+    ts = list(t_generator([2020, 8, 1, "AM"], [2020, 9, 7, "PM"]))
+    allpixels = _allpixels()
+    allpixels["FRP"] = 1.0
+    allfires = Allfires(ts[0])
+    for fid in (0, 1):
+        f = Fire(fid, ts[0], allpixels)
+        f.t_st = ts[0]
+        f.hull = box(0, 0, 1e4, 1e4 * (fid + 1))
+        f.fline = None
+        f.ftype = 1
+        allfires.fires[fid] = f
+    allfires.update_gdf()
+
+    allfires.cleanup(ts[-1])
+    allfires.fires[1].t_ed = ts[-1]
+    fids_dead = allfires.fids_dead
+    allfires.evict_deadfires()
+
+    assert fids_dead == allfires.fids_dead == [0]
+    assert not allfires.fires.loaded(0) and allfires.fires.loaded(1)
+    assert allfires.fids_active == [1]
+    f0 = allfires.fires[0]
+    assert allfires.fires.loaded(0)
+    assert f0.t == ts[-1] and f0.t_ed == ts[0]
+    assert f0.farea == 100
+
+
+def test_allfires_lazy_fires_stay_lazy():
+    import pickle
+    from shapely.geometry import box
+
+    ts = list(t_generator([2020, 8, 1, "AM"], [2020, 9, 7, "PM"]))
+    allpixels = _allpixels()
+    allpixels["FRP"] = 1.0
+    allfires = Allfires(ts[0])
+    for fid in (0, 1):
+        f = Fire(fid, ts[0], allpixels)
+        f.t_st = ts[0]
+        f.hull = box(0, 0, 1e4, 1e4 * (fid + 1))
+        f.fline = None
+        f.ftype = 1
+        allfires.fires[fid] = f
+    allfires.update_gdf()
+    allfires.cleanup(ts[-1])
+    allfires.fires[1].t_ed = ts[-1]
+    allfires.evict_deadfires()
+
+    # ids, table attributes and pickling do not build the evicted fire
+    assert allfires.fids == [0, 1]
+    f0 = allfires.fires.view(0)
+    assert (f0.fireID, f0.t, f0.t_ed, f0.isdead) == (0, ts[-1], ts[0], True)
+    loaded = pickle.loads(pickle.dumps(allfires))
+    assert not allfires.fires.loaded(0)
+    assert not loaded.fires.loaded(0) and loaded.fires.loaded(1)
+    assert loaded.fids == [0, 1] and loaded.fids_dead == [0]
+
+    # and it is rebuilt from the gdf on access
+    assert loaded.fires[0].t_ed == ts[0]
+    assert loaded.fires[0].farea == 100
+
+
+def test_fire_added_to_another_allfires_is_copied():
+    import copy
+    from shapely.geometry import box
+
+    allpixels = _allpixels()
+    allpixels["FRP"] = 1.0
+    allfires, other = Allfires(TS[-1]), Allfires(TS[-1])
+    f = Fire(0, TS[-1], allpixels)
+    f.pixels = allpixels.iloc[:100]
+    f.hull = box(0, 0, 1e4, 1e4)
+    allfires.fires[0] = f
+
+    other.fires[0] = allfires.fires[0]
+    g = other.fires[0]
+    assert g is not f and allfires.fires[0] is f
+    g.invalid = True
+    assert allfires.fids_valid == [0] and other.fids_valid == []
+
+    # copies compute their own properties
+    h = copy.copy(f)
+    assert h.n_pixels == 100
+    assert f._cache == {}
@@ -0,0 +1,60 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fireatlas.FireTime import (
+    t2hd,
+    hd2t,
+    dt2hd,
+    hd2dt,
+    t2dt,
+    t_nb,
+    t_dif,
+    t_generator,
+)
+
+
+def _t_dif_reference(t1, t2):
+    dt = (date(*t2[:-1]) - date(*t1[:-1])).days
+    if t1[-1] != t2[-1]:
+        dt += -0.5 if t1[-1] == "PM" else 0.5
+    return dt
+
+
+@pytest.mark.parametrize(
+    "t", [[1970, 1, 1, "AM"], [2020, 2, 29, "PM"], [2023, 12, 31, "PM"], [1969, 12, 31, "PM"]]
+)
+def test_hd_roundtrip(t):
+    hd = t2hd(t)
+    assert hd2t(hd) == t
+    assert t2hd(tuple(t)) == hd
+    assert dt2hd(t2dt(t)) == hd
+    assert hd2dt(hd) == np.datetime64(t2dt(t))
+    assert t_nb(t, "next") == hd2t(hd + 1)
+    assert t_nb(t_nb(t, "next"), "previous") == t
+
+
+def test_hd_vectorized():
+    ts = list(t_generator([2019, 12, 30, "PM"], [2020, 3, 2, "AM"]))
+    dts = pd.Series([t2dt(t) for t in ts])
+    hds = dt2hd(dts)
+    assert hds.dtype == np.int64
+    assert np.array_equal(hds, np.arange(t2hd(ts[0]), t2hd(ts[-1]) + 1))
+    assert np.array_equal(hd2dt(hds), dts.values)
+
+
+def test_t_dif():
+    ts = list(t_generator([2020, 12, 28, "AM"], [2021, 1, 3, "PM"]))
+    for t1 in ts:
+        for t2 in ts:
+            assert t_dif(t1, t2) == _t_dif_reference(t1, t2)
+
+
+def test_t_generator_tuple_endpoints():
+    ts = list(t_generator((2023, 11, 9, "AM"), (2023, 11, 10, "PM")))
+    assert [list(t) for t in ts] == [
+        [2023, 11, 9, "AM"], [2023, 11, 9, "PM"], [2023, 11, 10, "AM"], [2023, 11, 10, "PM"]
+    ]
+    assert len(list(t_generator((2023, 11, 9, "AM"), [2023, 11, 9, "AM"]))) == 1
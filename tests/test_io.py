@@ -4,6 +4,7 @@ from unittest.mock import MagicMock
 import pytest
 import geopandas as gpd
 import pandas as pd
+import shapely
 from shapely.geometry import Point, Polygon
 
 import fireatlas
@@ -112,6 +113,55 @@ def test_afp_regfilter(
         assert df_expected_count > len(df_filtered)
 
 
+def test_afp_regfilter_region_with_holes():
+    import numpy as np
+
+    # a region with static source holes cut out, and pixels on its boundaries
+    region = Polygon([(0, 0), (0, 3), (3, 3), (3, 0), (0, 0)]).difference(
+        gpd.GeoSeries(
+            [Point(x, y) for x in (0.5, 1.5, 2.5) for y in (0.5, 1.5, 2.5)]
+        ).buffer(0.2).unary_union
+    )
+    rng = np.random.default_rng(0)
+    lon = np.concatenate([rng.uniform(-0.5, 3.5, 2000), [0, 1.5, 3, 0.7]])
+    lat = np.concatenate([rng.uniform(-0.5, 3.5, 2000), [1, 3, 0, 0.5]])
+    input_df = pd.DataFrame({"Lat": lat, "Lon": lon, "FRP": np.arange(len(lat))})
+
+    df_filtered = FireIO.AFP_regfilter(input_df, region)
+
+    points = gpd.GeoSeries(gpd.points_from_xy(lon, lat))
+    expected = input_df[points.within(region).values]
+    assert list(df_filtered.index) == list(expected.index)
+    assert list(df_filtered.columns) == ["Lat", "Lon", "FRP", "x", "y"]
+    assert not shapely.is_prepared(region)  # the caller's geometry is unchanged
+
+
+def test_afp_toprj_matches_to_crs():
+    import numpy as np
+    from fireatlas import settings
+
+    input_df = pd.DataFrame({"Lat": [37.2, 40.5, 45.1], "Lon": [-119.3, -105.2, -80.4]})
+    df = FireIO.AFP_toprj(input_df)
+
+    expected = gpd.GeoSeries(
+        gpd.points_from_xy(input_df.Lon, input_df.Lat), crs=4326
+    ).to_crs(epsg=settings.EPSG_CODE)
+    np.testing.assert_allclose(df.x, expected.x)
+    np.testing.assert_allclose(df.y, expected.y)
+    assert "x" not in input_df
+    assert FireIO.get_transformer(4326, settings.EPSG_CODE) is FireIO.get_transformer(4326, settings.EPSG_CODE)
+
+
+def test_geo_to_polar_roundtrip():
+    import numpy as np
+
+    lon, lat = np.array([-150.0, 20.5, 100.0]), np.array([65.0, 70.2, 80.9])
+    x, y = FireIO.geo_to_polar(lon, lat)
+    lon2, lat2 = FireIO.polar_to_geo(x, y)
+    np.testing.assert_allclose(lon2, lon)
+    np.testing.assert_allclose(lat2, lat)
+
+
 @pytest.mark.parametrize(
     "local_settings_dir, s3_settings_dir, filename, fs_mock",
     [
@@ -141,3 +191,63 @@ def test_copy_from_local_to_s3(
 
         # assert
         fs_mock.put_file.assert_called_with(expected_local_filepath, expected_s3_filepath)
+
+
+@pytest.mark.parametrize("band", ["i", "m"])
+def test_viirs_pixel_size_table(band):
+    import numpy as np
+
+    n_samples = FireIO.VIIRS_N_SAMPLES[band]
+    rng = np.random.default_rng(0)
+    for sample in [
+        np.arange(n_samples),
+        rng.integers(0, n_samples, 1000).astype(np.int32),
+    ]:
+        expected = FireIO._viirs_pixel_size(sample, band)
+        result = FireIO.viirs_pixel_size(sample, band=band, rtSCAN_ANGLE=True)
+        for r, e in zip(result, expected):
+            np.testing.assert_array_equal(r, e)
+
+    # scalar samples, and samples outside the table (calculated)
+    assert FireIO.viirs_pixel_size(200, band=band) == tuple(FireIO._viirs_pixel_size(200, band)[:2])
+    sample = np.array([-1, n_samples])
+    np.testing.assert_array_equal(
+        FireIO.viirs_pixel_size(sample, band=band)[0], FireIO._viirs_pixel_size(sample, band)[0]
+    )
+
+
+@pytest.mark.slow
+def test_viirs_pixel_size_benchmark():
+    """a month of VNP14IMGML rows"""
+    import time
+    import numpy as np
+
+    sample = np.random.default_rng(0).integers(0, 6400, 3_000_000)
+    FireIO.viirs_pixel_size(sample[:1])  # build the table
+
+    t0 = time.perf_counter()
+    DS, DT = FireIO.viirs_pixel_size(sample)
+    t_table = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    DS_ref, DT_ref, _ = FireIO._viirs_pixel_size(sample, "i")
+    t_formula = time.perf_counter() - t0
+
+    print(
+        f"viirs_pixel_size n={len(sample)}: table {t_table:.3f}s, "
+        f"formula {t_formula:.3f}s ({t_formula / t_table:.1f}x)"
+    )
+    np.testing.assert_array_equal(DS, DS_ref)
+    np.testing.assert_array_equal(DT, DT_ref)
+    assert t_table < t_formula
+
+
+def test_afp_regfilter_no_pixels():
+    # an empty frame read from a file with no pixels has object columns
+    input_df = pd.DataFrame({"Lat": [], "Lon": [], "FRP": []}, dtype=object)
+    region = Polygon([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)])
+
+    df_filtered = FireIO.AFP_regfilter(input_df, region)
+
+    assert df_filtered.empty
+    assert list(df_filtered.columns) == ["Lat", "Lon", "FRP", "x", "y"]
@@ -1,8 +1,10 @@
+import os
+
 from shapely.geometry import Polygon
 import pytest
 
-from fireatlas import settings
-from fireatlas.FireMain import maybe_remove_static_sources
+from fireatlas import settings, FireTime
+from fireatlas.FireMain import maybe_remove_static_sources, pixel_t_slices
 from fireatlas.FireTypes import Region
 
 @pytest.mark.parametrize(
@@ -40,3 +42,138 @@ def test_maybe_remove_static_sources(
         assert isinstance(geom, Polygon)
         # check if there are any interior rings (holes)
         assert len(geom.interiors) > 0
+
+
+def test_pixel_t_slices():
+    import pandas as pd
+    from fireatlas.FireTime import t2dt, t_generator
+
+    ts = list(t_generator([2020, 9, 5, "AM"], [2020, 9, 8, "PM"]))
+    counts = [3, 0, 1, 5, 0, 2, 4, 1]
+    allpixels = pd.DataFrame(
+        {"t": [t2dt(t) for t, n in zip(ts, counts) for _ in range(n)]},
+        index=[f"p{i}" for i in range(sum(counts))],
+    )
+    t_slices = pixel_t_slices(allpixels)
+
+    for t in ts:
+        expected = allpixels[allpixels["t"] == t2dt(t)]
+        sl = t_slices.get(FireTime.t2hd(t), slice(0, 0))
+        pd.testing.assert_frame_equal(allpixels.iloc[sl], expected)
+
+
+def test_append_pixels():
+    import pandas as pd
+    from fireatlas.FireMain import append_pixels
+    from fireatlas.FireTime import t2dt, t_generator
+
+    ts = list(t_generator([2020, 9, 5, "AM"], [2020, 9, 8, "PM"]))
+    counts = [3, 0, 1, 5, 0, 2, 4, 1]
+    dfs, start = [], 0
+    for t, n in zip(ts, counts):
+        dfs.append(
+            pd.DataFrame(
+                {"x": range(start, start + n), "t": t2dt(t)},
+                index=pd.Index([f"p{i}" for i in range(start, start + n)], name="uuid"),
+            )
+        )
+        start += n
+
+    eager = pd.concat([df for df in dfs if not df.empty])
+    eager["fid"] = -1
+    eager["in_fline"] = None
+    eager["ext_until"] = None
+
+    allpixels = dfs[0].assign(fid=-1, in_fline=None, ext_until=None)
+    t_slices = pixel_t_slices(allpixels)
+    for i in range(1, len(dfs), 3):
+        allpixels = append_pixels(allpixels, dfs[i : i + 3], t_slices)
+
+    pd.testing.assert_frame_equal(allpixels, eager)
+    assert t_slices == pixel_t_slices(eager)
+
+
+def test_next_pixel_block():
+    import pandas as pd
+    from fireatlas.FireMain import next_pixel_block
+
+    counts = [3, 0, 1, 5, 0, 2, 4, 1]
+    stream = iter([pd.DataFrame({"x": range(n)}) for n in counts])
+
+    # at least prefetch time steps, more until there are min_rows pixels
+    assert [len(df) for df in next_pixel_block(stream, 2)] == [3, 0]
+    assert [len(df) for df in next_pixel_block(stream, 2, min_rows=6)] == [1, 5]
+    assert [len(df) for df in next_pixel_block(stream, 1, min_rows=100)] == [0, 2, 4, 1]
+    assert next_pixel_block(stream, 2) == []
+
+
+@pytest.mark.parametrize(
+    "steps, minutes, expected",
+    [
+        (0, 0, [False, False, False]),
+        (3, 0, [False, True, True]),
+        (0, 10, [False, False, True]),
+    ],
+)
+def test_checkpoint_due(steps, minutes, expected, monkeypatch):
+    from fireatlas.FireMain import checkpoint_due
+
+    monkeypatch.setattr(settings, "checkpoint_steps", steps)
+    monkeypatch.setattr(settings, "checkpoint_minutes", minutes)
+    assert [checkpoint_due(n, m) for n, m in [(2, 1), (3, 5), (3, 12)]] == expected
+
+
+def test_fire_forward_stream_and_checkpoints_match_eager(test_data_dir, tmpdir, monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from fireatlas import FireMain, postprocess
+
+    # read the Creek test data preprocessed files, write outputs to tmpdir
+    os.symlink(
+        os.path.join(test_data_dir, settings.PREPROCESSED_DIR),
+        os.path.join(tmpdir, settings.PREPROCESSED_DIR),
+    )
+    for k, v in dict(
+        LOCAL_PATH=str(tmpdir),
+        EPSG_CODE=9311,
+        FIRE_SOURCE="SNPP",
+        FIRE_NRT=False,
+        remove_static_sources=False,
+        FTYP_OPT="preset",
+        CONT_OPT="preset",
+    ).items():
+        monkeypatch.setattr(settings, k, v)
+    region = ("v3_test_data_for_Creek_SNPP", [-119.5, 36.8, -118.9, 37.7])
+    tst, t_mid, ted = [2020, 9, 5, "AM"], [2020, 9, 15, "PM"], [2020, 9, 25, "PM"]
+
+    def run(output_dir, **kwargs):
+        monkeypatch.setattr(settings, "OUTPUT_DIR", output_dir)
+        if kwargs.pop("checkpoints", False):
+            # checkpoints up to t_mid, then resume from the save at t_mid
+            monkeypatch.setattr(settings, "checkpoint_steps", 5)
+            FireMain.Fire_Forward(tst=tst, ted=t_mid, restart=True, region=region, read_location="local")
+            FireMain.Fire_Forward(tst=tst, ted=ted, restart=False, region=region, read_location="local", **kwargs)
+            monkeypatch.setattr(settings, "checkpoint_steps", 0)
+        else:
+            FireMain.Fire_Forward(tst=tst, ted=ted, restart=True, region=region, read_location="local", **kwargs)
+        return (
+            postprocess.read_allfires_gdf(tst, ted, region, location="local"),
+            postprocess.read_allpixels(tst, ted, region, location="local"),
+        )
+
+    gdf, allpixels = run("eager")
+    assert (allpixels.fid >= 0).sum() > 1000
+    for output_dir, kwargs in [
+        ("stream", dict(stream=True, prefetch=2)),
+        ("checkpoints", dict(checkpoints=True, stream=True, prefetch=2)),
+    ]:
+        gdf_run, allpixels_run = run(output_dir, **kwargs)
+
+        pd.testing.assert_index_equal(gdf_run.index, gdf.index)
+        for col in ["mergeid", "n_pixels", "invalid", "ftype"]:
+            pd.testing.assert_series_equal(gdf_run[col], gdf[col])
+        for col in ["farea", "fperim"]:
+            np.testing.assert_allclose(gdf_run[col], gdf[col], rtol=1e-9)
+        pd.testing.assert_index_equal(allpixels_run.index, allpixels.index)
+        pd.testing.assert_series_equal(allpixels_run.fid, allpixels.fid)
+
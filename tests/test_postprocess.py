@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 from fireatlas import postprocess
@@ -24,3 +26,188 @@ def test_snapshot_folder(location):
     snapshot_folder = postprocess.snapshot_folder(region, tst, ted, location=location)
     assert "/FEDSoutput-v3/TESTING123/2023/Snapshot" in snapshot_folder
 
+
+
+def test_allpixels_partitions_and_delta(tmpdir, monkeypatch):
+    import pandas as pd
+    from fireatlas import settings
+    from fireatlas.FireTime import t2dt, t_generator
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    region = ["TESTING123", None]
+    ts = list(t_generator((2023, 11, 9, "AM"), (2023, 11, 11, "PM")))
+    tst, t_saved, ted = ts[0], ts[2], ts[-1]
+
+    allpixels = pd.DataFrame(
+        {
+            "x": [float(i) for i in range(12)],
+            "t": [t2dt(ts[i // 2]) for i in range(12)],
+            "fid": -1,
+            "in_fline": None,
+            "ext_until": None,
+        },
+        index=pd.Index([f"p{i}" for i in range(12)], name="uuid"),
+    )
+    allpixels.loc[["p0", "p1"], "fid"] = 0
+    allpixels.loc[["p0"], "ext_until"] = t2dt(ts[0])
+    postprocess.save_allpixels(allpixels[allpixels.t <= t2dt(t_saved)], tst, t_saved, region)
+
+    saved, base = postprocess.read_allpixels(
+        tst, t_saved, region, location="local", with_base=True
+    )
+    assert list(saved.index) == [f"p{i}" for i in range(6)]
+    assert list(saved.fid) == [0, 0, -1, -1, -1, -1]
+
+    # a pixel of an earlier time step changes, later time steps are added
+    allpixels.loc[["p2", "p8"], "fid"] = 1
+    allpixels.loc[["p2"], "in_fline"] = True
+    delta_filepath = postprocess.save_allpixels(allpixels, tst, ted, region, base=base)
+    assert list(pd.read_parquet(delta_filepath).index) == ["p2"]
+
+    result = postprocess.read_allpixels(tst, ted, region, location="local")
+    pd.testing.assert_series_equal(result.fid, allpixels.fid)
+    assert result.loc["p2", "in_fline"] == True
+    assert result.loc["p0", "ext_until"] == t2dt(ts[0])
+    assert pd.isna(result.loc["p1", "ext_until"])
+    assert list(postprocess.read_allpixels(tst, t_saved, region, location="local").fid) == [0, 0, -1, -1, -1, -1]
+
+    result = postprocess.read_allpixels(tst, ted, region, location="local", columns=["x"])
+    assert list(result.columns) == ["x"]
+    assert list(result.x) == list(allpixels.x)
+
+
+def test_allfires_gdf_partitions_and_delta(tmpdir, monkeypatch):
+    import pandas as pd
+    import geopandas as gpd
+    from shapely.geometry import Point
+    from fireatlas import settings
+    from fireatlas.FireTime import t2dt, t_generator
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    region = ["TESTING123", None]
+    ts = list(t_generator((2023, 11, 9, "AM"), (2023, 11, 10, "PM")))
+    tst, t_saved, ted = ts[0], ts[1], ts[-1]
+
+    index = pd.MultiIndex.from_tuples(
+        [(fid, t2dt(t)) for t in ts for fid in (1, 2)], names=["fireID", "t"]
+    )
+    gdf = gpd.GeoDataFrame(
+        {"mergeid": [1, 2] * len(ts), "farea": [0.1 * i for i in range(len(index))]},
+        index=index,
+        geometry=[Point(i, i).buffer(1) for i in range(len(index))],
+        crs=f"epsg:{settings.EPSG_CODE}",
+    )
+    saved_rows = gdf.index.get_level_values("t") <= t2dt(t_saved)
+    postprocess.save_allfires_gdf(gdf[saved_rows], tst, t_saved, region)
+
+    saved, base = postprocess.read_allfires_gdf(
+        tst, t_saved, region, location="local", with_base=True
+    )
+    assert list(saved.index) == list(gdf.index[saved_rows])
+    assert list(base.mergeid) == [1, 2, 1, 2]
+
+    # fire 2 merges into fire 1, later time steps are added
+    gdf.loc[gdf.index.get_level_values("fireID") == 2, "mergeid"] = 1
+    delta_filepath = postprocess.save_allfires_gdf(gdf, tst, ted, region, base=base)
+    assert list(pd.read_parquet(delta_filepath).index) == [
+        (2, t2dt(ts[0])), (2, t2dt(ts[1]))
+    ]
+
+    result = postprocess.read_allfires_gdf(tst, ted, region, location="local")
+    assert list(result.index) == list(gdf.index)
+    assert list(result.mergeid) == [1] * len(gdf)
+    assert list(result.farea) == list(gdf.farea)
+    assert result.crs == gdf.crs
+    assert list(postprocess.read_allfires_gdf(tst, t_saved, region, location="local").mergeid) == [1, 2, 1, 2]
+
+
+def test_allpixels_saved_base_chains_saves(tmpdir, monkeypatch):
+    import os
+    import pandas as pd
+    from fireatlas import settings
+    from fireatlas.FireTime import t2dt, t_generator
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    region = ["TESTING123", None]
+    ts = list(t_generator((2023, 11, 9, "AM"), (2023, 11, 11, "PM")))
+    tst, t_ck, ted = ts[0], ts[2], ts[-1]
+
+    allpixels = pd.DataFrame(
+        {
+            "x": [float(i) for i in range(12)],
+            "t": [t2dt(ts[i // 2]) for i in range(12)],
+            "fid": -1,
+            "in_fline": None,
+            "ext_until": None,
+        },
+        index=pd.Index(range(12), name="pixel_id"),
+    )
+    # a checkpoint at t_ck, then the final save at ted with the saved state
+    postprocess.save_allpixels(allpixels, tst, t_ck, region)
+    base = postprocess.saved_allpixels_base(allpixels, t_ck)
+    assert list(base.index) == list(range(6))
+    partition = postprocess.allpixels_partition_filepath(tst, ts[0], region, location="local")
+    mtime = os.stat(partition).st_mtime_ns
+
+    allpixels.loc[[1, 8], "fid"] = 2
+    delta_filepath = postprocess.save_allpixels(allpixels, tst, ted, region, base=base)
+
+    assert os.stat(partition).st_mtime_ns == mtime  # not written again
+    assert list(pd.read_parquet(delta_filepath).index) == [1]
+    result = postprocess.read_allpixels(tst, ted, region, location="local")
+    pd.testing.assert_series_equal(result.fid, allpixels.fid)
+
+
+def test_get_t_of_last_allfires_run_reads_manifest(tmpdir, monkeypatch):
+    from fireatlas import settings
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    region = ["TESTING123", None]
+    tst, ted = (2023, 11, 9, "AM"), (2023, 11, 12, "PM")
+
+    # saves from before the manifest: allfires and allpixels saved whole
+    all_dir = postprocess.all_dir(tst, region, location="local")
+    os.makedirs(all_dir)
+    for filename in ["allfires_20231110_AM.parq", "allpixels_20231110_AM.csv"]:
+        open(os.path.join(all_dir, filename), "w").close()
+    assert postprocess.get_t_of_last_allfires_run(tst, ted, region, location="local") == [2023, 11, 10, "AM"]
+
+    # the manifest lists the complete saves, whatever files are around
+    open(os.path.join(all_dir, "allfires_delta_20231112_AM.parq"), "w").close()
+    postprocess.save_manifest([(2023, 11, 11, "PM"), [2023, 11, 9, "PM"]], tst, region)
+    assert postprocess.read_saved_ts(tst, region, location="local") == [
+        [2023, 11, 9, "PM"], [2023, 11, 11, "PM"]
+    ]
+    assert postprocess.get_t_of_last_allfires_run(tst, ted, region, location="local") == [2023, 11, 11, "PM"]
+    assert postprocess.get_t_of_last_allfires_run(tst, (2023, 11, 11, "AM"), region, location="local") == [2023, 11, 9, "PM"]
+    assert postprocess.get_t_of_last_allfires_run(tst, (2023, 11, 9, "AM"), region, location="local") is None
+
+
+def test_read_allfires_gdf_saved_whole(tmpdir, monkeypatch):
+    import pandas as pd
+    import geopandas as gpd
+    from shapely.geometry import Point
+    from fireatlas import settings
+    from fireatlas.FireTime import t2dt
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    region = ["TESTING123", None]
+    tst, ted = (2023, 11, 9, "AM"), (2023, 11, 9, "PM")
+
+    gdf = gpd.GeoDataFrame(
+        {"mergeid": [1, 1]},
+        index=pd.MultiIndex.from_tuples(
+            [(1, t2dt(tst)), (1, t2dt(ted))], names=["fireID", "t"]
+        ),
+        geometry=[Point(0, 0).buffer(1), Point(1, 1).buffer(1)],
+    )
+    # the name the whole gdf was saved with before partitions
+    all_dir = postprocess.all_dir(tst, region, location="local")
+    os.makedirs(all_dir)
+    gdf.to_parquet(os.path.join(all_dir, "allfires_20231109_PM.parq"))
+
+    assert os.path.basename(
+        postprocess.allfires_filepath(tst, ted, region, location="local")
+    ) == "allfires_delta_20231109_PM.parq"
+    result = postprocess.read_allfires_gdf(tst, ted, region, location="local")
+    assert list(result.index) == list(gdf.index)
@@ -233,3 +233,156 @@ def test_preprocess_region_t(
         os.remove(outfile_df_path)
 
 
+
+
+def test_pixel_ids():
+    from fireatlas.FireTime import t2hd
+
+    hd = t2hd((2023, 11, 9, "AM"))
+    sats = ["SNPP", "NOAA20", "SNPP", "NOAA20", "SNPP"]
+    ids = preprocess.pixel_ids(hd, sats)
+    assert ids.dtype == "int64"
+    assert len(set(ids)) == len(sats)
+    assert list(ids) == list(preprocess.pixel_ids(hd, sats))
+    assert set(preprocess.pixel_ids(hd + 1, sats)).isdisjoint(ids)
+    assert list(ids >> (preprocess.PIXEL_ID_SAT_BITS + preprocess.PIXEL_ID_ROW_BITS)) == [hd] * len(sats)
+
+    with pytest.raises(ValueError):
+        preprocess.pixel_ids(hd, ["SNPP", "MODIS"])
+
+
+def test_read_preprocessed_uuid_file(tmpdir, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    t = (2023, 11, 9, "AM")
+    region = ["TestRegion", None]
+    filename = preprocess.preprocessed_filename(t, region=region, location="local")
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    pd.DataFrame(
+        {
+            "uuid": ["a7f5c0de-0000-4000-8000-000000000000", "0b1d5c0de-0000-4000-8000-000000000001"],
+            "Lat": [0.5, 0.7],
+            "Sat": ["SNPP", "SNPP"],
+            "datetime": ["2023-11-09 00:03:00", "2023-11-09 00:03:00"],
+        }
+    ).to_csv(filename, index=False)
+
+    df = preprocess.read_preprocessed(t, region, location="local")
+    assert df.index.name == "pixel_id"
+    assert df.index.dtype == "int64"
+    assert "uuid" not in df.columns
+    assert list(df.index) == list(preprocess.pixel_ids(preprocess.t2hd(t), df.Sat))
+
+
+def _preprocessed_pixels(n, t=(2023, 11, 9, "AM"), seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Lat": rng.uniform(25, 49, n),
+            "Lon": rng.uniform(-125, -67, n),
+            "FRP": rng.uniform(0, 100, n),
+            "Sat": "SNPP",
+            "DT": rng.uniform(0.3, 0.6, n),
+            "DS": rng.uniform(0.3, 0.6, n),
+            "input_filename": f"SUOMI_VIIRS_C2_Global_VNP14IMGTDL_NRT_{t[0]}{t[1]:02}{t[2]:02}.txt",
+            "datetime": pd.Timestamp(*t[:3], 9, 30) + pd.to_timedelta(rng.integers(0, 600, n), unit="min"),
+            "ampm": t[3],
+        }
+    )
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_read_preprocessed_input_detects_format(tmpdir, monkeypatch, fmt):
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    t = (2023, 11, 9, "AM")
+    df = _preprocessed_pixels(10, t)
+    filepath = preprocess.preprocessed_filename(t, sat="SNPP", location="local", fmt=fmt)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    preprocess.write_preprocessed_file(df, filepath)
+
+    # the format written is found whichever format is configured
+    for configured in ["csv", "parquet"]:
+        monkeypatch.setattr(settings, "PREPROCESSED_FORMAT", configured)
+        result = preprocess.read_preprocessed_input(t, sat="SNPP", location="local")
+        assert len(result) == 10
+        assert result["datetime"].dtype == "datetime64[ns]"
+        assert list(result["datetime"]) == list(df["datetime"])
+
+    if fmt == "parquet":
+        assert result["Lat"].dtype == "float32"
+        assert result["Sat"].dtype == "category"
+        assert result["ampm"].dtype == "category"
+
+    with pytest.raises(FileNotFoundError):
+        preprocess.read_preprocessed_input((2023, 11, 9, "PM"), sat="SNPP", location="local")
+
+
+def test_convert_preprocessed_files(tmpdir, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    t = (2023, 11, 9, "AM")
+    filepath = preprocess.preprocessed_filename(t, sat="SNPP", location="local", fmt="csv")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    preprocess.write_preprocessed_file(_preprocessed_pixels(10, t), filepath)
+
+    output_paths = preprocess.convert_preprocessed_files(location="local", remove=True)
+
+    assert output_paths == [preprocess.preprocessed_filename(t, sat="SNPP", location="local", fmt="parquet")]
+    assert not os.path.exists(filepath)
+    assert preprocess.check_preprocessed_file(t, t, sat="SNPP", location="local") == []
+    assert len(preprocess.read_preprocessed_input(t, sat="SNPP", location="local")) == 10
+
+
+@pytest.mark.slow
+def test_read_preprocessed_input_benchmark(tmpdir, monkeypatch):
+    """read time of a season (Jun-Oct) of CONUS sized half-day files"""
+    import time
+    from fireatlas.FireTime import t_generator
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    ts = list(t_generator((2023, 6, 1, "AM"), (2023, 10, 31, "PM")))
+    for i, t in enumerate(ts):
+        df = _preprocessed_pixels(5000, t, seed=i)
+        for fmt in ["csv", "parquet"]:
+            filepath = preprocess.preprocessed_filename(t, sat="SNPP", location="local", fmt=fmt)
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            preprocess.write_preprocessed_file(df, filepath)
+
+    read_times = {}
+    for fmt in ["csv", "parquet"]:
+        t0 = time.perf_counter()
+        for t in ts:
+            preprocess.read_preprocessed_file(
+                preprocess.preprocessed_filename(t, sat="SNPP", location="local", fmt=fmt)
+            )
+        read_times[fmt] = time.perf_counter() - t0
+
+    print(
+        f"read {len(ts)} time steps: csv {read_times['csv']:.2f}s, "
+        f"parquet {read_times['parquet']:.2f}s "
+        f"({read_times['csv'] / read_times['parquet']:.1f}x)"
+    )
+    assert read_times["parquet"] < read_times["csv"]
+
+
+def test_preprocess_input_file_monthly(tmpdir, monkeypatch):
+    import numpy as np
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", str(tmpdir))
+    days = [(2023, 11, d, ampm) for d in (1, 2, 3) for ampm in ("AM", "PM")]
+    df = pd.concat([_preprocessed_pixels(5, t, seed=i) for i, t in enumerate(days)])
+    df = df[~((df.datetime.dt.day == 2) & (df.ampm == "PM"))]  # no pixels
+    df = df.sample(frac=1, random_state=0).assign(Type=0)
+    monkeypatch.setattr(FireIO, "read_VNP14IMGML", lambda filepath: df.copy())
+    monkeypatch.setattr(FireIO, "AFP_setampm", lambda df: df)
+
+    output_paths = preprocess.preprocess_input_file("VNP14IMGML.202311.C2.01.txt")
+
+    assert output_paths == [
+        preprocess.preprocessed_filename(t, sat="SNPP", location="local") for t in days
+    ]
+    for t, filepath in zip(days, output_paths):
+        result = preprocess.read_preprocessed_file(filepath)
+        expected = df[(df.datetime.dt.day == t[2]) & (df.ampm == t[3])]
+        assert len(result) == (0 if t == (2023, 11, 2, "PM") else 5)
+        np.testing.assert_allclose(result.FRP.astype(float), expected.FRP)
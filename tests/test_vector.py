@@ -0,0 +1,179 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial import Delaunay
+from shapely.geometry import MultiLineString
+from shapely.ops import unary_union, polygonize
+
+from fireatlas import FireVector
+
+
+def _doConcH_reference(points, alpha):
+    """the original per-simplex alpha shape, kept to check parity"""
+    coords = points
+    tri = Delaunay(coords)
+    edges = set()
+    edge_points = []
+
+    def add_edge(i, j):
+        if (i, j) in edges or (j, i) in edges:
+            return
+        edges.add((i, j))
+        edge_points.append(coords[[i, j]])
+
+    for ia, ib, ic in tri.simplices:
+        pa, pb, pc = coords[ia], coords[ib], coords[ic]
+        a = math.sqrt((pa[0] - pb[0]) ** 2 + (pa[1] - pb[1]) ** 2)
+        b = math.sqrt((pb[0] - pc[0]) ** 2 + (pb[1] - pc[1]) ** 2)
+        c = math.sqrt((pc[0] - pa[0]) ** 2 + (pc[1] - pa[1]) ** 2)
+        s = (a + b + c) / 2.0
+        try:
+            area = math.sqrt(s * (s - a) * (s - b) * (s - c))
+        except ValueError:
+            area = 0
+        circum_r = a * b * c / (4.0 * area) if area > 0 else 0
+        if circum_r < alpha:
+            add_edge(ia, ib)
+            add_edge(ib, ic)
+            add_edge(ic, ia)
+    return unary_union(list(polygonize(MultiLineString(edge_points))))
+
+
+def _fire_pixels(n, seed, grid=True):
+    """clumps of pixels, optionally snapped to a ~VIIRS sized grid"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 30000 * np.sqrt(n / 1000), size=(max(1, n // 200), 2))
+    pts = centers[rng.integers(0, len(centers), n)] + rng.normal(0, 1200, (n, 2))
+    if grid:
+        pts = np.round(pts / 37.5) * 37.5
+    return pts
+
+
+@pytest.mark.parametrize(
+    "n, seed, grid", [(5, 0, False), (50, 1, True), (500, 2, False), (2000, 3, True)]
+)
+def test_doConcH_matches_reference(n, seed, grid):
+    pts = _fire_pixels(n, seed, grid=grid)
+
+    hull = FireVector.doConcH(pts, alpha=1000)
+    expected = _doConcH_reference(pts, alpha=1000)
+
+    assert hull.is_valid
+    assert hull.symmetric_difference(expected).area <= 1e-6 * max(expected.area, 1)
+
+
+def test_doConcH_no_triangles_kept():
+    pts = np.array([[0, 0], [5000, 0], [0, 5000], [5000, 5000]])
+    hull = FireVector.doConcH(pts, alpha=1000)
+    assert hull.is_empty
+    assert hull.area == 0
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("n", [1000, 10000, 100000])
+def test_doConcH_benchmark(n):
+    pts = _fire_pixels(n, seed=n, grid=True)
+
+    t0 = time.perf_counter()
+    FireVector.doConcH(pts, alpha=1000)
+    t_vectorized = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    _doConcH_reference(pts, alpha=1000)
+    t_reference = time.perf_counter() - t0
+
+    print(
+        f"doConcH n={n}: vectorized {t_vectorized:.3f}s, "
+        f"per-simplex {t_reference:.3f}s ({t_reference / t_vectorized:.1f}x)"
+    )
+    assert t_vectorized < t_reference
+
+
+@pytest.mark.parametrize("opt", ["none", "interior", "grid"])
+def test_prune_hull_pixels(opt, monkeypatch):
+    monkeypatch.setattr(FireVector.settings, "hull_prune_opt", opt)
+    locs = _fire_pixels(3000, seed=4, grid=True)
+
+    pruned, n_pruned = FireVector.prune_hull_pixels(locs)
+    assert len(pruned) + n_pruned == len(locs)
+
+    if opt == "none":
+        assert n_pruned == 0
+    else:
+        assert n_pruned > 0
+
+    # dropping interior pixels leaves the hull unchanged
+    if opt == "interior":
+        expected = FireVector.cal_hull(locs, prune=False)
+        hull = FireVector.cal_hull(locs)
+        assert hull.symmetric_difference(expected).area <= 1e-9 * expected.area
+
+
+def test_prune_hull_pixels_interior_ring(monkeypatch):
+    from shapely.geometry import Point
+
+    monkeypatch.setattr(FireVector.settings, "hull_prune_opt", "interior")
+    # a thick ring of pixels enclosing a gap too wide for alpha shape triangles
+    grid = np.arange(-5000, 5001, 125.0)
+    pts = np.stack(np.meshgrid(grid, grid), axis=-1).reshape(-1, 2)
+    r = np.hypot(pts[:, 0], pts[:, 1])
+    locs = pts[(r >= 2000) & (r <= 4200)]
+
+    pruned, n_pruned = FireVector.prune_hull_pixels(locs)
+    assert n_pruned > 0
+
+    # the pixels kept around the dropped ones still enclose the gap
+    expected = FireVector.cal_hull(locs, prune=False)
+    hull = FireVector.cal_hull(locs)
+    assert hull.contains(Point(0, 0))
+    assert hull.symmetric_difference(expected).area <= 1e-9 * expected.area
+
+
+def test_prune_hull_pixels_interior_creek(test_data_dir, monkeypatch):
+    from fireatlas import preprocess, settings
+    from fireatlas.FireTime import t_generator
+
+    monkeypatch.setattr(settings, "LOCAL_PATH", test_data_dir)
+    monkeypatch.setattr(settings, "FIRE_SOURCE", "SNPP")
+    monkeypatch.setattr(settings, "hull_prune_opt", "interior")
+    region = ("v3_test_data_for_Creek_SNPP", [-119.5, 36.8, -118.9, 37.7])
+    ts = list(t_generator([2020, 9, 5, "AM"], [2020, 9, 25, "PM"]))
+    dfs = [preprocess.read_preprocessed(t, region, location="local") for t in ts]
+    dfs = [df for df in dfs if len(df) > 0]
+
+    # the pixels up to a few time steps of the Creek fire
+    for n in [4, 12, len(dfs)]:
+        locs = pd.concat(dfs[:n])[["x", "y"]].values
+        pruned, n_pruned = FireVector.prune_hull_pixels(locs)
+        assert n_pruned > 0
+
+        expected = FireVector.cal_hull(locs, prune=False)
+        hull = FireVector.cal_hull(locs)
+        assert hull.symmetric_difference(expected).area <= 1e-9 * expected.area
+
+
+@pytest.mark.parametrize("hull_workers", [0, 2])
+def test_cal_hulls(hull_workers, monkeypatch):
+    monkeypatch.setattr(FireVector.settings, "hull_workers", hull_workers)
+    rng = np.random.default_rng(6)
+    sizes = [1, 2, 3, 4, 60, 400, 1, 2]
+    cids = np.repeat(np.arange(len(sizes)) * 10, sizes)
+    pts = np.vstack([_fire_pixels(n, seed=i) + i * 1e5 for i, n in enumerate(sizes)])
+    # shuffle so pixels of a cluster are not contiguous
+    shuffle = rng.permutation(len(cids))
+    pixels = pd.DataFrame({"x": pts[shuffle, 0], "y": pts[shuffle, 1], "initial_cid": cids[shuffle]})
+
+    hulls = FireVector.cal_hulls(pixels)
+
+    assert list(hulls.index) == sorted(set(cids))
+    for cid, group in pixels.groupby("initial_cid"):
+        expected = FireVector.cal_hull(group[["x", "y"]].values)
+        assert hulls[cid].symmetric_difference(expected).area <= 1e-6 * expected.area
+
+
+def test_cal_hulls_empty():
+    pixels = pd.DataFrame({"x": [], "y": [], "initial_cid": []})
+    assert len(FireVector.cal_hulls(pixels)) == 0